@@ -0,0 +1,89 @@
+"""Per-response CPU cost of serializing large milestone lists.
+
+Compares the old path (raw Mongo dicts through jsonable_encoder and the stdlib
+JSONResponse) with the current one (response_model=List[Milestone] validated
+by pydantic-core and rendered by ORJSONResponse). Both apps serve the same
+in-memory documents, so the difference is serialization alone.
+
+    python bench_serialization.py [sizes...]    # default: 100 1000 10000
+"""
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+# Mirrors server.Milestone; importing server would need the database and AI settings
+class Milestone(BaseModel):
+    id: str
+    goal_id: str
+    user_id: str
+    what_learned: str
+    learning_source: str
+    can_teach_others: bool
+    hours_invested: float
+    project_certificate_link: Optional[str] = None
+    created_at: str
+    month_year: str
+
+def make_milestones(count: int) -> List[dict]:
+    goal_id = str(uuid.uuid4())
+    user_id = str(uuid.uuid4())
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "goal_id": goal_id,
+            "user_id": user_id,
+            "what_learned": f"Skill {i} from a fairly descriptive learning entry",
+            "learning_source": f"Source {i % 25}",
+            "can_teach_others": i % 3 == 0,
+            "hours_invested": 1.5 + i % 7,
+            "project_certificate_link": None if i % 2 else f"https://example.com/cert/{i}",
+            "created_at": datetime(2024, 1 + i % 12, 1 + i % 28).isoformat(),
+            "month_year": f"2024-{1 + i % 12:02d}"
+        }
+        for i in range(count)
+    ]
+
+def build_apps(milestones: List[dict]):
+    before = FastAPI(default_response_class=JSONResponse)
+    after = FastAPI(default_response_class=ORJSONResponse)
+
+    @before.get("/milestones")
+    async def before_milestones():
+        return milestones
+
+    @after.get("/milestones", response_model=List[Milestone])
+    async def after_milestones():
+        return milestones
+
+    return before, after
+
+def cpu_per_response(app: FastAPI, requests: int) -> float:
+    with TestClient(app) as client:
+        client.get("/milestones")  # warm up
+        start = time.process_time()
+        for _ in range(requests):
+            response = client.get("/milestones")
+        elapsed = time.process_time() - start
+    assert response.status_code == 200
+    return elapsed / requests * 1000
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    print(f"{'milestones':>10}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+    for size in sizes:
+        milestones = make_milestones(size)
+        before, after = build_apps(milestones)
+        requests = max(5, 20000 // size)
+        before_ms = cpu_per_response(before, requests)
+        after_ms = cpu_per_response(after, requests)
+        print(f"{size:>10}  {before_ms:>10.2f}  {after_ms:>10.2f}  {before_ms / after_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,563 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, File, Query, Request, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pymongo import MongoClient
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReplaceOne, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pydantic import BaseModel, EmailStr, TypeAdapter, ValidationError
+from starlette.datastructures import Headers, MutableHeaders
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
+from collections import deque
+from contextlib import aclosing, contextmanager
 import os
 import jwt
 import hashlib
+import math
+import re
 import uuid
 from bson import ObjectId
 import asyncio
+import base64
+import bisect
+import codecs
+import contextvars
+import csv
+import io
+import numpy as np
+import json
+import sys
+import time
+import zlib
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
+# Metrics
+# Prometheus text exposition without a client library, served at /metrics.
+# Histograms have fixed buckets and every series is a plain list updated in
+# place on the event loop. Mongo command timings arrive on motor's executor
+# threads and are handed over through a deque (append/popleft are atomic), so
+# recording never takes a lock.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+MONGO_SAMPLE_BUFFER = 10000
+
+def format_labels(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+def metric_lines(name: str, description: str, metric_type: str, label_names: Tuple[str, ...], samples: Dict[tuple, float]) -> List[str]:
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+    lines += [f"{name}{format_labels(label_names, labels)} {value}" for labels, value in samples.items()]
+    return lines
+
+class Histogram:
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self.series: Dict[tuple, list] = {}
+    
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        bucket_label_names = self.label_names + ("le",)
+        for labels, (counts, total) in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{format_labels(bucket_label_names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+http_request_histogram = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+mongo_command_histogram = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command", ("collection", "command", "outcome")
+)
+llm_latency_histogram = Histogram(
+    "llm_call_duration_seconds", "LLM call latency", ("route", "model", "outcome"), LLM_LATENCY_BUCKETS
+)
+http_in_flight = {"requests": 0}
+# The ASGI scope of the request being handled; motor copies the context into
+# its executor threads, so command listeners can see which route issued a command
+current_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_request_scope", default=None)
+
+def current_route_name() -> str:
+    scope = current_request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command; runs on whichever thread pymongo executes it on"""
+    
+    def __init__(self):
+        self.pending: Dict[tuple, tuple] = {}
+        self.samples = deque(maxlen=MONGO_SAMPLE_BUFFER)
+    
+    def started(self, event):
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self.pending[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "-", event.command_name
+        )
+    
+    def succeeded(self, event):
+        self._finish(event, "success")
+    
+    def failed(self, event):
+        self._finish(event, "failure")
+    
+    def _finish(self, event, outcome: str):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        if started:
+            self.samples.append((started[0], started[1], outcome, event.duration_micros / 1e6))
+        # Motor copies the request's context into the thread running the command
+        timings = current_timings.get()
+        if timings is not None:
+            timings.spans.append(("mongo", event.duration_micros / 1000))
+    
+    def drain(self):
+        """Fold the handed-over samples into the histogram (event loop only)"""
+        while True:
+            try:
+                collection, command, outcome, seconds = self.samples.popleft()
+            except IndexError:
+                return
+            mongo_command_histogram.observe(seconds, collection, command, outcome)
+
+mongo_command_metrics = MongoCommandMetrics()
+
+# Request timing
+# Phase durations for the current request (JWT decode, Mongo commands, context
+# building, LLM calls, serialization), sent as a Server-Timing header and, with
+# REQUEST_LOG_JSON set, logged as one JSON line per request. span() is a no-op
+# outside a request.
+REQUEST_LOG_JSON = os.environ.get('REQUEST_LOG_JSON', '').lower() in ("1", "true", "yes")
+
+class RequestTimings:
+    __slots__ = ("spans", "endpoint_done")
+    
+    def __init__(self):
+        # (phase, ms); list.append is atomic, so Mongo listener threads record here too
+        self.spans: List[Tuple[str, float]] = []
+        self.endpoint_done: Optional[float] = None
+    
+    def phases(self) -> Dict[str, list]:
+        """phase -> [total ms, count]"""
+        phases = {}
+        for name, duration_ms in list(self.spans):
+            phase = phases.setdefault(name, [0.0, 0])
+            phase[0] += duration_ms
+            phase[1] += 1
+        return phases
+
+current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("current_timings", default=None)
+
+@contextmanager
+def span(name: str):
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans.append((name, (time.perf_counter() - started) * 1000))
+
+class TimedRoute(APIRoute):
+    """Records everything after the endpoint returns (response model validation and rendering) as "serialize" """
+    
+    def get_route_handler(self):
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+            async def timed_endpoint(**values):
+                try:
+                    return await endpoint(**values)
+                finally:
+                    timings = current_timings.get()
+                    if timings is not None:
+                        timings.endpoint_done = time.perf_counter()
+            self.dependant.call = timed_endpoint
+        handler = super().get_route_handler()
+        
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = current_timings.get()
+            if timings is not None and timings.endpoint_done is not None:
+                timings.spans.append(("serialize", (time.perf_counter() - timings.endpoint_done) * 1000))
+            return response
+        return timed_handler
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings = RequestTimings()
+        current_timings.set(timings)
+        request_id = Headers(scope=scope).get("x-request-id", "")[:64] or uuid.uuid4().hex
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                entries = [
+                    f"{name};dur={total:.1f}" + (f';desc="{count} calls"' if count > 1 else "")
+                    for name, (total, count) in timings.phases().items()
+                ]
+                entries.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", ", ".join(entries))
+                headers["Timing-Allow-Origin"] = "*"
+                headers["X-Request-ID"] = request_id
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if REQUEST_LOG_JSON:
+                route = scope.get("route")
+                print(json.dumps({
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "route": getattr(route, "path", scope["path"]),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "phases": {
+                        name: {"ms": round(total, 1), "count": count}
+                        for name, (total, count) in timings.phases().items()
+                    }
+                }))
+
+# Slow query log
+# Commands slower than SLOW_QUERY_THRESHOLD_MS are kept in a bounded ring
+# buffer with their redacted shape, duration and calling route. The first
+# occurrence of each shape is queued for an explain (queryPlanner only, run
+# from the event loop); later occurrences reuse that plan for
+# SLOW_QUERY_EXPLAIN_TTL. Served at /api/admin/slow-queries.
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', '200'))
+SLOW_QUERY_EXPLAIN_TTL = float(os.environ.get('SLOW_QUERY_EXPLAIN_TTL_SECONDS', '600'))
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Driver and session bookkeeping, not part of what the command does
+COMMAND_NOISE_FIELDS = {"lsid", "txnNumber", "$db", "$clusterTime", "$readPreference", "readConcern", "writeConcern", "$readConcern"}
+# Values that describe the shape rather than user data
+SHAPE_KEEP_FIELDS = {"sort", "$sort", "projection", "$project", "limit", "$limit", "skip", "$skip", "batchSize", "ordered", "upsert", "multi", "new", "allowDiskUse"}
+
+def redact_shape(value: Any, keep: bool = False) -> Any:
+    """The command with every literal replaced by "?"; lists of literals collapse to one"""
+    if isinstance(value, dict):
+        return {k: redact_shape(v, keep or k in SHAPE_KEEP_FIELDS) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [redact_shape(v, keep) for v in value]
+        if not keep and items and all(item == "?" for item in items):
+            return ["?"]
+        return items
+    return value if keep else "?"
+
+def command_shape(command_name: str, command: dict) -> dict:
+    shape = {}
+    for key, value in command.items():
+        if key in COMMAND_NOISE_FIELDS:
+            continue
+        if key == command_name:
+            # Collection name; getMore carries a cursor id here instead
+            shape[key] = value if isinstance(value, str) else "?"
+        elif key in ("documents", "updates", "deletes") and isinstance(value, list):
+            # One representative statement and the batch size
+            shape[key] = [redact_shape(value[0])] if value else []
+            shape[f"{key}_count"] = len(value)
+        else:
+            shape[key] = redact_shape(value, key in SHAPE_KEEP_FIELDS)
+    return shape
+
+def plan_stages(node: Any) -> List[str]:
+    """Every stage name in an explain output, excluding rejected plans"""
+    stages = []
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                stages += plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            stages += plan_stages(item)
+    return stages
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.pending: Dict[tuple, tuple] = {}
+        self.entries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        # (entry, raw command) waiting for the event loop to explain them
+        self.explain_queue = deque(maxlen=50)
+        # shape key -> {"plan": ..., "expires_at": ...}
+        self.plans: Dict[str, dict] = {}
+    
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        self.pending[(event.connection_id, event.request_id)] = (event.command_name, event.command, event.database_name, current_route_name())
+    
+    def succeeded(self, event):
+        self._finish(event, "success")
+    
+    def failed(self, event):
+        self._finish(event, "failure")
+    
+    def _finish(self, event, outcome: str):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < SLOW_QUERY_THRESHOLD_MS:
+            return
+        command_name, command, database_name, route = started
+        collection = command.get("collection" if command_name == "getMore" else command_name)
+        shape = command_shape(command_name, command)
+        shape_key = hashlib.sha1(json.dumps(shape, sort_keys=True, default=str).encode()).hexdigest()
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "route": route,
+            "database": database_name,
+            "collection": collection if isinstance(collection, str) else None,
+            "command": command_name,
+            "shape": shape,
+            "shape_key": shape_key,
+            "duration_ms": round(duration_ms, 1),
+            "outcome": outcome,
+            "plan": None
+        }
+        
+        known = self.plans.get(shape_key)
+        if known and known["expires_at"] > time.monotonic():
+            entry["plan"] = known["plan"]
+        elif command_name in EXPLAINABLE_COMMANDS:
+            # Claim the shape so concurrent repeats are not explained twice
+            self.plans[shape_key] = {"plan": {"status": "pending"}, "expires_at": time.monotonic() + SLOW_QUERY_EXPLAIN_TTL}
+            entry["plan"] = self.plans[shape_key]["plan"]
+            self.explain_queue.append((entry, database_name, command))
+        self.entries.append(entry)
+    
+    async def explain_pending(self):
+        now = time.monotonic()
+        for shape_key, known in list(self.plans.items()):
+            if known["expires_at"] <= now:
+                self.plans.pop(shape_key, None)
+        
+        while self.explain_queue:
+            entry, database_name, command = self.explain_queue.popleft()
+            plan = entry["plan"]
+            explained = {k: v for k, v in command.items() if k not in COMMAND_NOISE_FIELDS}
+            try:
+                result = await client[database_name].command({"explain": explained, "verbosity": "queryPlanner"})
+                stages = plan_stages(result)
+                plan.update({"status": "done", "stages": stages, "collscan": "COLLSCAN" in stages})
+            except Exception as e:
+                plan.update({"status": "error", "error": str(e)})
+    
+    def recent(self, limit: int, collscan_only: bool = False) -> List[dict]:
+        entries = reversed(list(self.entries))
+        if collscan_only:
+            entries = (e for e in entries if (e["plan"] or {}).get("collscan"))
+        return list(entries)[:limit]
+
+slow_query_recorder = SlowQueryRecorder()
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        current_request_scope.set(scope)
+        http_in_flight["requests"] += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight["requests"] -= 1
+            # The route template, so path parameters do not become separate series
+            route = scope.get("route")
+            http_request_histogram.observe(
+                time.perf_counter() - started, scope["method"], getattr(route, "path", "unmatched"), str(status_code)
+            )
+            mongo_command_metrics.drain()
+
 # Database setup
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = MongoClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[mongo_command_metrics, slow_query_recorder])
 db = client.learning_tracker
 
-app = FastAPI()
+# orjson for every JSON response; routes with a response_model are serialized by pydantic-core first
+app = FastAPI(default_response_class=ORJSONResponse)
+app.router.route_class = TimedRoute
+
+# Managed indexes, keyed by collection. Every hot query shape in this module
+# should be covered here; they are (re)applied idempotently at startup.
+MANAGED_INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("department", ASCENDING)], name="department"),
+    ],
+    "goals": [
+        IndexModel([("id", ASCENDING), ("user_id", ASCENDING)], name="id_user"),
+        # Keyset pagination sorts on (created_at, id) newest first
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="user_status",
+        ),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_created"),
+    ],
+    "milestones": [
+        IndexModel([("id", ASCENDING), ("user_id", ASCENDING)], name="id_user"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_created"),
+        IndexModel(
+            [("user_id", ASCENDING), ("month_year", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="user_month_created",
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("goal_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="user_goal_created",
+        ),
+    ],
+    # One versioned document per user
+    "ai_recommendations": [
+        IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+    ],
+    "recommendation_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # At most one pending/running job per user
+        IndexModel([("user_id", ASCENDING)], name="user_active_unique", unique=True,
+                   partialFilterExpression={"active": True}),
+        IndexModel([("active", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)], name="active_status_created"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "shared_recommendation_cache": [
+        IndexModel([("signature", ASCENDING)], name="signature_unique", unique=True),
+        IndexModel([("last_used_at", ASCENDING)], name="last_used"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "llm_call_log": [
+        IndexModel([("model", ASCENDING), ("created_at", DESCENDING)], name="model_created"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "llm_leases": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "user_month_rollups": [
+        IndexModel([("user_id", ASCENDING), ("month_year", ASCENDING)], name="user_month_unique", unique=True),
+    ],
+    "resource_directory": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("usage_count", DESCENDING), ("id", ASCENDING)], name="usage_id"),
+    ],
+    "resource_skills": [
+        IndexModel([("resource_id", ASCENDING), ("skill_key", ASCENDING)], name="resource_skill_unique", unique=True),
+        IndexModel([("resource_id", ASCENDING), ("count", DESCENDING), ("skill_key", ASCENDING)], name="resource_count"),
+    ],
+}
+
+# Outcome of the last index bootstrap, reported by /api/health
+index_status: Dict[str, Dict[str, str]] = {}
+
+# Conflicting index options / key specs for an existing index name
+INDEX_CONFLICT_CODES = (85, 86)
+
+async def migrate_legacy_documents():
+    """One-off data migrations that must run before the managed indexes are applied"""
+    # Recommendations used to be stored one document per item; they are only a
+    # cache, so drop them rather than block the unique user_id index
+    await db.ai_recommendations.delete_many({"recommendations": {"$exists": False}})
+    if "user_fingerprint" in await db.ai_recommendations.index_information():
+        await db.ai_recommendations.drop_index("user_fingerprint")
+
+async def ensure_indexes():
+    """Create every managed index, migrating any whose definition has changed"""
+    for collection_name, indexes in MANAGED_INDEXES.items():
+        collection = db[collection_name]
+        status_by_name = index_status.setdefault(collection_name, {})
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await collection.create_indexes([index])
+                status_by_name[name] = "ok"
+            except OperationFailure as e:
+                if e.code not in INDEX_CONFLICT_CODES:
+                    print(f"Index {collection_name}.{name} failed: {str(e)}")
+                    status_by_name[name] = f"error: {str(e)}"
+                    continue
+                # Same name or same keys with a different definition: drop and rebuild
+                try:
+                    keys = list(index.document["key"].items())
+                    existing = await collection.index_information()
+                    for existing_name, info in existing.items():
+                        if existing_name == name or info.get("key") == keys:
+                            await collection.drop_index(existing_name)
+                    await collection.create_indexes([index])
+                    status_by_name[name] = "migrated"
+                except OperationFailure as e2:
+                    print(f"Index {collection_name}.{name} migration failed: {str(e2)}")
+                    status_by_name[name] = f"error: {str(e2)}"
+
+@app.on_event("startup")
+async def startup_indexes():
+    try:
+        await migrate_legacy_documents()
+        await ensure_indexes()
+    except Exception as e:
+        # Never block startup on index creation; /api/health shows the outcome
+        print(f"Index bootstrap error: {str(e)}")
+
+@app.on_event("startup")
+async def startup_rollups():
+    # First deploy against existing data: backfill derived collections without blocking startup
+    try:
+        if await db.milestones.estimated_document_count() > 0:
+            if await db.user_month_rollups.estimated_document_count() == 0:
+                asyncio.create_task(rebuild_user_month_rollups())
+            if await db.resource_directory.estimated_document_count() == 0:
+                asyncio.create_task(rebuild_resource_directory())
+    except Exception as e:
+        print(f"Rollup bootstrap error: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    client.close()
 
 # CORS middleware
 app.add_middleware(
@@ -27,8 +566,134 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Recommendations-Stale", "X-Recommendation-Job", "ETag", "Server-Timing", "X-Request-ID"],
 )
 
+# Response compression
+# Negotiates br (when the optional brotli package is installed) or gzip.
+# Complete bodies under COMPRESSION_MIN_SIZE are sent as-is; streamed bodies
+# are compressed chunk by chunk with a flush after each, so NDJSON/CSV exports
+# still arrive progressively. Responses that already carry a Content-Encoding
+# (pre-compressed caches) and SSE streams pass through untouched.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_SKIP_TYPES = ("text/event-stream", "image/", "application/gzip", "application/zip")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content coding this server can produce, or None for identity"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+class StreamCompressor:
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=4 if level is None else level)
+        else:
+            # wbits=31: gzip container
+            self.compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            output = self.compressor.process(data)
+            return output + self.compressor.flush() if flush else output
+        output = self.compressor.compress(data)
+        return output + self.compressor.flush(zlib.Z_SYNC_FLUSH) if flush else output
+    
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+def compress_bytes(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        compressor = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if (
+                    "content-encoding" in headers
+                    or start_message["status"] in (204, 304)
+                    or headers.get("content-type", "").startswith(COMPRESSION_SKIP_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                
+                compressor = StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start_message)
+            
+            if more_body:
+                await send({"type": "http.response.body", "body": compressor.compress(body, flush=True), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.compress(body) + compressor.finish()})
+        
+        await self.app(scope, receive, send_compressed)
+
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+# Added last so it is outermost and times the whole stack
+app.add_middleware(RequestMetricsMiddleware)
+
 # JWT setup
 SECRET_KEY = "your-secret-key-here"
 ALGORITHM = "HS256"
@@ -36,6 +701,24 @@ security = HTTPBearer()
 
 # AI setup
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+RECOMMENDATION_CACHE_TTL = timedelta(hours=float(os.environ.get('RECOMMENDATION_CACHE_TTL_HOURS', '24')))
+RECOMMENDATION_HISTORY_SIZE = max(1, int(os.environ.get('RECOMMENDATION_HISTORY_SIZE', '3')))
+RECOMMENDATION_WORKERS = int(os.environ.get('RECOMMENDATION_WORKERS', '2'))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '4'))
+LLM_MAX_QUEUE = int(os.environ.get('LLM_MAX_QUEUE', '16'))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('LLM_QUEUE_TIMEOUT_SECONDS', '2'))
+LLM_TIMEOUT_SECONDS = float(os.environ.get('LLM_TIMEOUT_SECONDS', '30'))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_RESET_SECONDS = float(os.environ.get('LLM_BREAKER_RESET_SECONDS', '30'))
+LOCAL_RECOMMENDER_REFRESH_SECONDS = float(os.environ.get('LOCAL_RECOMMENDER_REFRESH_SECONDS', '3600'))
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '500'))
+PROMPT_MAX_ITEM_CHARS = int(os.environ.get('PROMPT_MAX_ITEM_CHARS', '120'))
+LLM_LARGE_MODEL = os.environ.get('LLM_LARGE_MODEL', 'gpt-4o')
+LLM_SMALL_MODEL = os.environ.get('LLM_SMALL_MODEL', 'gpt-4o-mini')
+# Contexts with fewer distinct signals (skills, interests, goals, recent learning) go to the small model
+LLM_ROUTING_MIN_SIGNALS = int(os.environ.get('LLM_ROUTING_MIN_SIGNALS', '6'))
+SHARED_CACHE_TTL = timedelta(hours=float(os.environ.get('SHARED_CACHE_TTL_HOURS', '72')))
+SHARED_CACHE_MAX_ENTRIES = int(os.environ.get('SHARED_CACHE_MAX_ENTRIES', '5000'))
 
 # Pydantic models
 class UserRegister(BaseModel):
@@ -55,6 +738,7 @@ class UserLogin(BaseModel):
 
 class LearningGoal(BaseModel):
     id: str
+    user_id: str
     title: str
     description: str
     target_completion: str
@@ -86,6 +770,33 @@ class MilestoneCreate(BaseModel):
     hours_invested: float
     project_certificate_link: Optional[str] = None
 
+class GoalUpdate(BaseModel):
+    """Partial update; fields left out keep their stored values"""
+    title: Optional[str] = None
+    description: Optional[str] = None
+    target_completion: Optional[str] = None
+    status: Optional[str] = None
+
+class MilestoneUpdate(BaseModel):
+    """Partial update; fields left out keep their stored values"""
+    goal_id: Optional[str] = None
+    what_learned: Optional[str] = None
+    learning_source: Optional[str] = None
+    can_teach_others: Optional[bool] = None
+    hours_invested: Optional[float] = None
+    project_certificate_link: Optional[str] = None
+
+class ProfileUpdate(BaseModel):
+    # Only the fields employees may edit; id, email, role, password and the
+    # bookkeeping fields are owned by the server
+    full_name: Optional[str] = None
+    position: Optional[str] = None
+    department: Optional[str] = None
+    date_of_joining: Optional[str] = None
+    existing_skills: Optional[List[str]] = None
+    learning_interests: Optional[List[str]] = None
+    profile_picture: Optional[str] = None
+
 class AIRecommendation(BaseModel):
     id: str
     user_id: str
@@ -98,10 +809,503 @@ class AIRecommendation(BaseModel):
     priority_score: int
     created_at: str
 
+class UserProfile(BaseModel):
+    id: str
+    full_name: str
+    email: str
+    position: str
+    department: str
+    date_of_joining: str
+    existing_skills: List[str] = []
+    learning_interests: List[str] = []
+    profile_picture: Optional[str] = None
+    role: str = "employee"
+    created_at: Optional[str] = None
+
+class MonthProgress(BaseModel):
+    total_hours: float
+    target_hours: float
+    progress_percentage: float
+    milestone_count: int
+    teachable_count: int
+    sources_used: List[str]
+    milestones: List[Milestone]
+    month_year: str
+
+class DashboardStats(BaseModel):
+    current_month_hours: float
+    target_hours: float
+    progress_percentage: float
+    total_milestones: int
+    total_hours: float
+    active_goals: int
+    recent_milestones: List[Milestone]
+
+class LearningResource(BaseModel):
+    id: str
+    name: str
+    usage_count: int
+    total_hours: float
+    skills_taught: List[str]
+    category: str
+
+# LLM load protection
+class LLMUnavailableError(Exception):
+    """The LLM call was shed: breaker open, limiter saturated or deadline exceeded"""
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_timeout one trial call decides whether to close again"""
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        # When the half-open trial call was admitted; None while no trial is in flight
+        self.probe_started_at: Optional[float] = None
+    
+    def allow_request(self) -> bool:
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self.probe_started_at = None
+        if self.state == "half_open":
+            # Only the trial call goes through; one that never reported back is replaced after reset_timeout
+            if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+                return False
+            self.probe_started_at = now
+        return True
+    
+    def release_probe(self):
+        """The admitted call was shed before reaching the provider; let the next caller probe"""
+        if self.state == "half_open":
+            self.probe_started_at = None
+    
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probe_started_at = None
+    
+    def record_failure(self):
+        self.failures += 1
+        self.probe_started_at = None
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+    
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "probe_in_flight": self.probe_started_at is not None
+        }
+
+class LLMLimiter:
+    """Caps concurrent LLM calls and how many callers may queue for a slot"""
+    
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+    
+    async def acquire(self):
+        if self.waiting >= self.max_queue:
+            raise LLMUnavailableError("LLM queue is full")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMUnavailableError("Timed out waiting for an LLM slot")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+    
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+    
+    async def call(self, coro_factory, timeout: float):
+        await self.acquire()
+        try:
+            return await asyncio.wait_for(coro_factory(), timeout=timeout)
+        finally:
+            self.release()
+    
+    def snapshot(self) -> dict:
+        return {"in_flight": self.in_flight, "queue_depth": self.waiting, "max_concurrency": self.max_concurrency}
+
+llm_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+llm_limiter = LLMLimiter(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
+llm_counters = {"calls": 0, "successes": 0, "failures": 0, "timeouts": 0, "rejected": 0}
+# Recommendations served without the LLM: from the local recommender or the static set
+recommendation_fallback_counters = {"local": 0, "static": 0}
+
+async def call_llm(chat, message) -> str:
+    """send_message behind the circuit breaker, concurrency limiter and deadline"""
+    if not llm_breaker.allow_request():
+        llm_counters["rejected"] += 1
+        raise LLMUnavailableError("LLM circuit breaker is open")
+    
+    llm_counters["calls"] += 1
+    try:
+        with span("llm"):
+            response = await llm_limiter.call(lambda: chat.send_message(message), timeout=LLM_TIMEOUT_SECONDS)
+    except LLMUnavailableError:
+        # Shed locally, says nothing about the provider's health
+        llm_counters["rejected"] += 1
+        llm_breaker.release_probe()
+        raise
+    except asyncio.TimeoutError:
+        llm_counters["timeouts"] += 1
+        llm_breaker.record_failure()
+        raise LLMUnavailableError(f"LLM call exceeded {LLM_TIMEOUT_SECONDS}s")
+    except Exception:
+        llm_counters["failures"] += 1
+        llm_breaker.record_failure()
+        raise
+    
+    llm_counters["successes"] += 1
+    llm_breaker.record_success()
+    return response
+
+async def stream_llm(chat, message):
+    """Yield response text as it arrives, behind the same guards as call_llm.
+
+    Falls back to a single chunk holding the whole completion when the chat
+    integration has no streaming API.
+    """
+    stream_message = getattr(chat, "stream_message", None)
+    if stream_message is None:
+        yield await call_llm(chat, message)
+        return
+    
+    if not llm_breaker.allow_request():
+        llm_counters["rejected"] += 1
+        raise LLMUnavailableError("LLM circuit breaker is open")
+    
+    try:
+        await llm_limiter.acquire()
+    except LLMUnavailableError:
+        llm_counters["rejected"] += 1
+        llm_breaker.release_probe()
+        raise
+    
+    llm_counters["calls"] += 1
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LLM_TIMEOUT_SECONDS
+    chunks = None
+    try:
+        # Opening the stream can fail too; the slot must still be released
+        chunks = stream_message(message).__aiter__()
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                break
+            yield chunk
+    except GeneratorExit:
+        # Closed by the consumer once it had enough; the provider was answering fine
+        llm_counters["successes"] += 1
+        llm_breaker.record_success()
+        raise
+    except asyncio.TimeoutError:
+        llm_counters["timeouts"] += 1
+        llm_breaker.record_failure()
+        raise LLMUnavailableError(f"LLM call exceeded {LLM_TIMEOUT_SECONDS}s")
+    except Exception:
+        llm_counters["failures"] += 1
+        llm_breaker.record_failure()
+        raise
+    finally:
+        llm_limiter.release()
+        if chunks is not None and hasattr(chunks, "aclose"):
+            await chunks.aclose()
+    
+    llm_counters["successes"] += 1
+    llm_breaker.record_success()
+
+class IncrementalJSONArrayParser:
+    """Pulls complete top-level objects out of a JSON array while it is still streaming in.
+
+    Text before the opening bracket (e.g. a ```json fence) is ignored.
+    """
+    
+    def __init__(self):
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.current: List[str] = []
+    
+    def feed(self, text: str) -> List[dict]:
+        completed = []
+        for char in text:
+            if not self.started:
+                if char == '[':
+                    self.started = True
+                    self.depth = 1
+                continue
+            if self.depth == 0:
+                # Array closed; ignore the trailing fence
+                continue
+            
+            if self.depth > 1:
+                self.current.append(char)
+            
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                if self.depth == 1:
+                    self.current = [char]
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 1 and self.current:
+                    try:
+                        item = json.loads("".join(self.current))
+                        if isinstance(item, dict):
+                            completed.append(item)
+                    except ValueError:
+                        pass
+                    self.current = []
+        return completed
+
+# Per model/route usage, in-process; every call is also logged to llm_call_log
+llm_route_stats: Dict[str, dict] = {}
+LLM_CALL_LOG_RETENTION = timedelta(days=30)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text or "") + 3) // 4
+
+async def record_llm_call(model: str, route: str, mode: str, prompt_tokens: int, completion_tokens: int,
+                          latency_ms: float, outcome: str):
+    stats = llm_route_stats.setdefault(f"{route}:{model}", {
+        "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms_total": 0.0
+    })
+    stats["calls"] += 1
+    stats["errors"] += 0 if outcome == "success" else 1
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+    stats["latency_ms_total"] += latency_ms
+    llm_latency_histogram.observe(latency_ms / 1000, route, model, outcome)
+    
+    now = datetime.utcnow()
+    try:
+        await db.llm_call_log.insert_one({
+            "model": model,
+            "route": route,
+            "mode": mode,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": round(latency_ms, 1),
+            "outcome": outcome,
+            "created_at": now.isoformat(),
+            "expires_at": now + LLM_CALL_LOG_RETENTION
+        })
+    except Exception as e:
+        print(f"LLM call log error: {str(e)}")
+
+def llm_metrics() -> dict:
+    routes = {
+        key: {**stats, "avg_latency_ms": round(stats["latency_ms_total"] / stats["calls"], 1) if stats["calls"] else 0.0}
+        for key, stats in llm_route_stats.items()
+    }
+    return {
+        "breaker": llm_breaker.snapshot(),
+        "limiter": llm_limiter.snapshot(),
+        "counters": dict(llm_counters),
+        "routes": routes
+    }
+
+# Local recommender
+# Deterministic recommendations from what colleagues have logged. Skills (the
+# normalized what_learned text of milestones) are items described by TF-IDF
+# term vectors; sources are ranked per skill by co-occurrence counts. The
+# model is rebuilt periodically off the event loop and scoring a user is a
+# single matrix-vector product.
+STOPWORDS = {"and", "the", "for", "with", "of", "to", "in", "on", "a", "an", "how", "using", "basics", "intro"}
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9+#]+", (text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+class LocalRecommender:
+    MAX_ITEMS = 1000
+    MAX_TERMS = 2000
+    MAX_PAIRS = 50000
+    
+    def __init__(self):
+        self.model: Optional[dict] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+    
+    async def refresh(self):
+        pipeline = [
+            {"$group": {
+                "_id": {"skill": "$what_learned", "source": "$learning_source"},
+                "count": {"$sum": 1},
+                "hours": {"$sum": "$hours_invested"}
+            }},
+            {"$sort": {"count": -1}},
+            {"$limit": self.MAX_PAIRS}
+        ]
+        rows = await db.milestones.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        model = await asyncio.to_thread(self._build, rows)
+        if model is not None:
+            self.model = model
+    
+    def _build(self, rows: List[dict]) -> Optional[dict]:
+        items: Dict[str, dict] = {}
+        for row in rows:
+            skill = (row["_id"].get("skill") or "").strip()
+            key = resource_skill_key(skill)
+            if not key:
+                continue
+            item = items.setdefault(key, {"title": skill, "count": 0, "hours": 0.0, "sources": {}})
+            item["count"] += row["count"]
+            item["hours"] += row["hours"] or 0
+            source = row["_id"].get("source") or ""
+            if source:
+                item["sources"][source] = item["sources"].get(source, 0) + row["count"]
+        if not items:
+            return None
+        
+        keys = sorted(items, key=lambda k: (-items[k]["count"], k))[:self.MAX_ITEMS]
+        item_terms = [tokenize(items[k]["title"]) for k in keys]
+        
+        document_frequency: Dict[str, int] = {}
+        for terms in item_terms:
+            for term in set(terms):
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        vocabulary = sorted(document_frequency, key=lambda t: (-document_frequency[t], t))[:self.MAX_TERMS]
+        term_index = {term: i for i, term in enumerate(vocabulary)}
+        
+        n_items = len(keys)
+        idf = np.array(
+            [math.log((1 + n_items) / (1 + document_frequency[t])) + 1 for t in vocabulary],
+            dtype=np.float32
+        )
+        tfidf = np.zeros((n_items, len(vocabulary)), dtype=np.float32)
+        for row, terms in enumerate(item_terms):
+            for term in terms:
+                if term in term_index:
+                    tfidf[row, term_index[term]] += 1
+        tfidf *= idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf /= np.where(norms == 0, 1, norms)
+        
+        counts = np.array([items[k]["count"] for k in keys], dtype=np.float32)
+        popularity = np.log1p(counts) / np.log1p(counts.max())
+        
+        return {
+            "keys": keys,
+            "items": [items[k] for k in keys],
+            "term_index": term_index,
+            "idf": idf,
+            "tfidf": tfidf,
+            "popularity": popularity,
+            "built_at": datetime.utcnow().isoformat()
+        }
+    
+    def recommend(self, user_profile: dict, goals: list, milestones: list, limit: int = 5) -> List[dict]:
+        model = self.model
+        if model is None:
+            return []
+        
+        # Interests and active goals say where the user wants to go; existing skills count less
+        weighted_text = [(skill, 1.0) for skill in user_profile.get('existing_skills', [])]
+        weighted_text += [(interest, 2.0) for interest in user_profile.get('learning_interests', [])]
+        weighted_text += [(goal.get('title', ''), 2.0) for goal in goals if goal.get('status') == 'active']
+        
+        query = np.zeros(len(model["term_index"]), dtype=np.float32)
+        for text, weight in weighted_text:
+            for term in tokenize(text):
+                if term in model["term_index"]:
+                    query[model["term_index"][term]] += weight
+        query *= model["idf"]
+        query_norm = np.linalg.norm(query)
+        
+        if query_norm > 0:
+            scores = 0.8 * (model["tfidf"] @ (query / query_norm)) + 0.2 * model["popularity"]
+        else:
+            scores = model["popularity"].copy()
+        
+        known = {resource_skill_key(m.get('what_learned', '')) for m in milestones}
+        known |= {resource_skill_key(skill) for skill in user_profile.get('existing_skills', [])}
+        for i, key in enumerate(model["keys"]):
+            if key in known:
+                scores[i] = -1
+        
+        recommendations = []
+        for i in np.argsort(-scores, kind="stable")[:limit]:
+            if scores[i] < 0:
+                break
+            item = model["items"][i]
+            avg_hours = item["hours"] / item["count"] if item["count"] else 0
+            top_sources = sorted(item["sources"], key=lambda src: (-item["sources"][src], src))[:3]
+            recommendations.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_profile['id'],
+                "title": item["title"],
+                "description": f"Logged {item['count']} times by colleagues, averaging {avg_hours:.1f} hours per milestone.",
+                "skill_category": "Peer Learning",
+                "recommended_resources": top_sources,
+                "difficulty_level": "Beginner" if avg_hours < 4 else "Intermediate" if avg_hours < 12 else "Advanced",
+                "estimated_hours": max(1, int(round(avg_hours))),
+                "priority_score": int(round(50 + 50 * float(min(max(scores[i], 0), 1)))),
+                "created_at": datetime.utcnow().isoformat()
+            })
+        return recommendations
+    
+    def snapshot(self) -> dict:
+        model = self.model
+        if model is None:
+            return {"ready": False}
+        return {
+            "ready": True,
+            "items": len(model["keys"]),
+            "terms": len(model["term_index"]),
+            "built_at": model["built_at"]
+        }
+
 # AI Service for learning recommendations
 class LearningRecommendationService:
+    SYSTEM_MESSAGE = """You are an expert learning and career development advisor.
+Generate personalized learning recommendations based on the user's profile, goals, and progress.
+Respond with EXACTLY 5 recommendations as a JSON array:
+[{"title": "Short specific skill/topic title", "description": "Brief 2-3 sentence description of why this is valuable", "skill_category": "Category like 'Technical', 'Leadership', 'Design', etc.", "recommended_resources": ["Resource 1", "Resource 2", "Resource 3"], "difficulty_level": "Beginner/Intermediate/Advanced", "estimated_hours": 8, "priority_score": 85}]
+Make recommendations practical, specific, and aligned with their career trajectory."""
+    
+    ROLE_TIERS = [
+        ("executive", {"chief", "ceo", "cto", "cfo", "coo", "vp", "director", "head"}),
+        ("manager", {"manager", "lead"}),
+        ("senior", {"senior", "sr", "principal", "staff"}),
+        ("junior", {"junior", "jr", "intern", "trainee", "graduate", "associate"}),
+    ]
+    
     def __init__(self):
         self.api_key = OPENAI_API_KEY
+        self.local = LocalRecommender()
     
     async def generate_recommendations(self, user_profile: dict, goals: list, milestones: list) -> List[dict]:
         if not self.api_key:
@@ -109,86 +1313,198 @@ class LearningRecommendationService:
         
         try:
             # Create personalized learning context
-            context = self._build_learning_context(user_profile, goals, milestones)
-            
-            # Initialize AI chat
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"learning-rec-{user_profile['id']}",
-                system_message="""You are an expert learning and career development advisor. 
-                Generate personalized learning recommendations based on the user's profile, goals, and progress.
-                
-                Respond with EXACTLY 5 recommendations in JSON format:
-                [
-                  {
-                    "title": "Short specific skill/topic title",
-                    "description": "Brief 2-3 sentence description of why this is valuable",
-                    "skill_category": "Category like 'Technical', 'Leadership', 'Design', etc.",
-                    "recommended_resources": ["Resource 1", "Resource 2", "Resource 3"],
-                    "difficulty_level": "Beginner/Intermediate/Advanced",
-                    "estimated_hours": 8,
-                    "priority_score": 85
-                  }
-                ]
-                
-                Make recommendations practical, specific, and aligned with their career trajectory."""
-            ).with_model("openai", "gpt-4o")
-            
+            with span("context"):
+                context = self._build_learning_context(user_profile, goals, milestones)
+            route, model = self._route_model(user_profile, goals, milestones)
+            chat = self._build_chat(user_profile, model)
             user_message = UserMessage(text=context)
+            prompt_tokens = estimate_tokens(self.SYSTEM_MESSAGE) + estimate_tokens(context)
             
             # Get AI response
-            response = await chat.send_message(user_message)
+            started = time.perf_counter()
+            try:
+                response = await call_llm(chat, user_message)
+            except Exception as e:
+                outcome = "unavailable" if isinstance(e, LLMUnavailableError) else "error"
+                await record_llm_call(model, route, "json", prompt_tokens, 0,
+                                      (time.perf_counter() - started) * 1000, outcome)
+                raise
+            await record_llm_call(model, route, "json", prompt_tokens, estimate_tokens(response),
+                                  (time.perf_counter() - started) * 1000, "success")
             
             # Parse and validate response
             recommendations = self._parse_ai_response(response, user_profile['id'])
             return recommendations
             
+        except LLMUnavailableError:
+            # Callers answer from the cache or the fallback set
+            raise
         except Exception as e:
             print(f"AI recommendation error: {str(e)}")
             return []
     
+    async def stream_recommendations(self, user_profile: dict, goals: list, milestones: list):
+        """Yield formatted recommendations one by one as the model produces them"""
+        if not self.api_key:
+            return
+        
+        with span("context"):
+            context = self._build_learning_context(user_profile, goals, milestones)
+        route, model = self._route_model(user_profile, goals, milestones)
+        chat = self._build_chat(user_profile, model)
+        prompt_tokens = estimate_tokens(self.SYSTEM_MESSAGE) + estimate_tokens(context)
+        parser = IncrementalJSONArrayParser()
+        count = 0
+        completion_chars = 0
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            # aclosing: stopping early must still release the limiter slot and record the breaker outcome
+            async with aclosing(stream_llm(chat, UserMessage(text=context))) as chunks:
+                async for chunk in chunks:
+                    completion_chars += len(chunk)
+                    for rec in parser.feed(chunk):
+                        if count < 5:  # Limit to 5
+                            yield self._format_recommendation(rec, count, user_profile['id'])
+                            count += 1
+                    if count >= 5:
+                        break
+            outcome = "success"
+        except LLMUnavailableError:
+            outcome = "unavailable"
+            raise
+        finally:
+            await record_llm_call(model, route, "stream", prompt_tokens, (completion_chars + 3) // 4,
+                                  (time.perf_counter() - started) * 1000, outcome)
+    
+    def _route_model(self, user_profile: dict, goals: list, milestones: list) -> Tuple[str, str]:
+        """Small, low-signal contexts go to the cheaper, faster model"""
+        signals = len({s.lower() for s in user_profile.get('existing_skills', []) if s})
+        signals += len({s.lower() for s in user_profile.get('learning_interests', []) if s})
+        signals += sum(1 for goal in goals if goal.get('status') == 'active')
+        signals += len({m.get('what_learned', '').lower() for m in milestones[-10:] if m.get('what_learned')})
+        if signals < LLM_ROUTING_MIN_SIGNALS:
+            return "small", LLM_SMALL_MODEL
+        return "large", LLM_LARGE_MODEL
+    
+    def _build_chat(self, user_profile: dict, model: str = LLM_LARGE_MODEL):
+        return LlmChat(
+            api_key=self.api_key,
+            session_id=f"learning-rec-{user_profile['id']}",
+            system_message=self.SYSTEM_MESSAGE
+        ).with_model("openai", model)
+    
+    def role_tier(self, position: str) -> str:
+        words = set(re.findall(r"[a-z]+", (position or "").lower()))
+        for tier, keywords in self.ROLE_TIERS:
+            if words & keywords:
+                return tier
+        return "mid"
+    
+    def profile_signature(self, user_profile: dict) -> str:
+        """Canonical profile bucket shared by colleagues with matching skills, department and role tier"""
+        def normalized(values):
+            return sorted({" ".join(v.lower().split()) for v in values or [] if v and v.strip()})
+        signature_input = {
+            "department": " ".join((user_profile.get('department') or "").lower().split()),
+            "role_tier": self.role_tier(user_profile.get('position', '')),
+            "skills": normalized(user_profile.get('existing_skills')),
+            "interests": normalized(user_profile.get('learning_interests'))
+        }
+        return hashlib.sha256(json.dumps(signature_input, sort_keys=True).encode()).hexdigest()
+    
+    def is_shareable_context(self, goals: list, milestones: list) -> bool:
+        """No active goals or milestones: the prompt is built from profile_signature fields only"""
+        return not milestones and not any(goal.get('status') == 'active' for goal in goals)
+    
+    def context_fingerprint(self, user_profile: dict, goals: list, milestones: list) -> str:
+        """Stable hash of every input _build_learning_context reads"""
+        fingerprint_input = {
+            "profile": [
+                user_profile.get('full_name', ''),
+                user_profile.get('position', ''),
+                user_profile.get('department', ''),
+                user_profile.get('date_of_joining', ''),
+                user_profile.get('existing_skills', []),
+                user_profile.get('learning_interests', [])
+            ],
+            "active_goals": [goal.get('title', '') for goal in goals if goal.get('status') == 'active'],
+            "milestones": [
+                [m.get('what_learned', ''), m.get('learning_source', ''), m.get('hours_invested', 0)]
+                for m in milestones[-10:]
+            ]
+        }
+        return hashlib.sha256(json.dumps(fingerprint_input, sort_keys=True).encode()).hexdigest()
+    
     def _build_learning_context(self, user_profile: dict, goals: list, milestones: list) -> str:
-        skills_learned = []
-        recent_sources = set()
-        total_hours = 0
-        
-        for milestone in milestones[-10:]:  # Last 10 milestones
-            skills_learned.append(milestone.get('what_learned', ''))
-            recent_sources.add(milestone.get('learning_source', ''))
-            total_hours += milestone.get('hours_invested', 0)
-        
-        active_goal_titles = [goal.get('title', '') for goal in goals if goal.get('status') == 'active']
-        
-        context = f"""
-        EMPLOYEE PROFILE:
-        - Name: {user_profile.get('full_name', '')}
-        - Position: {user_profile.get('position', '')}
-        - Department: {user_profile.get('department', '')}
-        - Experience: {user_profile.get('date_of_joining', '')}
-        - Current Skills: {', '.join(user_profile.get('existing_skills', []))}
-        - Learning Interests: {', '.join(user_profile.get('learning_interests', []))}
-        
-        CURRENT LEARNING GOALS:
-        {', '.join(active_goal_titles) if active_goal_titles else 'No active goals'}
-        
-        RECENT LEARNING ACTIVITY:
-        - Recent Skills Learned: {'; '.join(skills_learned[-5:]) if skills_learned else 'No recent activity'}
-        - Learning Sources Used: {', '.join(list(recent_sources)) if recent_sources else 'None'}
-        - Total Learning Hours: {total_hours} hours
-        
-        Please recommend 5 personalized learning opportunities that would:
-        1. Build on their existing skills and interests
-        2. Advance their career in their current role/department
-        3. Introduce complementary skills they haven't explored
-        4. Include both technical and soft skills where appropriate
-        5. Consider their learning pace and current workload
+        """Compact prompt context, trimmed to PROMPT_TOKEN_BUDGET.
+
+        A shareable context is described by the profile_signature fields alone
+        (department, role tier, skills, interests), so the generated set can be
+        handed to colleagues without carrying anything personal.
         """
+        def compact(values) -> List[str]:
+            seen = set()
+            result = []
+            for value in values:
+                value = " ".join(str(value or "").split())
+                if len(value) > PROMPT_MAX_ITEM_CHARS:
+                    value = value[:PROMPT_MAX_ITEM_CHARS - 1].rstrip() + "…"
+                if value and value.lower() not in seen:
+                    seen.add(value.lower())
+                    result.append(value)
+            return result
+        
+        recent = milestones[-10:]  # Last 10 milestones
+        total_hours = sum(m.get('hours_invested', 0) for m in recent)
+        if self.is_shareable_context(goals, milestones):
+            profile = [
+                ("Department", user_profile.get('department', '')),
+                ("Role level", self.role_tier(user_profile.get('position', '')))
+            ]
+        else:
+            profile = [
+                ("Name", user_profile.get('full_name', '')),
+                ("Position", user_profile.get('position', '')),
+                ("Department", user_profile.get('department', '')),
+                ("Joined", user_profile.get('date_of_joining', ''))
+            ]
+        # Trimmable sections, most expendable first
+        sections = [
+            ["Recent sources", compact(m.get('learning_source') for m in recent)],
+            ["Recently learned", compact(m.get('what_learned') for m in recent)[-5:]],
+            ["Skills", compact(user_profile.get('existing_skills', []))],
+            ["Interests", compact(user_profile.get('learning_interests', []))],
+            ["Active goals", compact(g.get('title') for g in goals if g.get('status') == 'active')]
+        ]
+        
+        def render() -> str:
+            lines = ["EMPLOYEE: " + "; ".join(f"{k}: {v}" for k, v in profile if v)]
+            lines += [f"{name}: " + "; ".join(items) for name, items in sections if items]
+            if total_hours:
+                lines.append(f"Recent learning hours: {total_hours:g}")
+            lines.append("Recommend 5 learning opportunities that build on their skills and interests, "
+                         "advance them in their role, add complementary technical and soft skills, "
+                         "and fit their learning pace.")
+            return "\n".join(lines)
+        
+        context = render()
+        while estimate_tokens(context) > PROMPT_TOKEN_BUDGET:
+            trimmable = [section for section in sections if section[1]]
+            if not trimmable:
+                break
+            # Drop one item from the longest section, preferring the most expendable on ties
+            longest = max(trimmable, key=lambda section: len(section[1]))
+            if longest[0] == "Recently learned":
+                longest[1] = longest[1][1:]  # oldest first
+            else:
+                longest[1] = longest[1][:-1]
+            context = render()
         
         return context
     
     def _parse_ai_response(self, response: str, user_id: str) -> List[dict]:
         try:
-            import json
             # Extract JSON from response
             response_clean = response.strip()
             if response_clean.startswith('```json'):
@@ -200,26 +1516,76 @@ class LearningRecommendationService:
             
             recommendations = []
             for idx, rec in enumerate(recommendations_data[:5]):  # Limit to 5
-                recommendation = {
-                    "id": str(uuid.uuid4()),
-                    "user_id": user_id,
-                    "title": rec.get('title', f'Learning Recommendation {idx + 1}'),
-                    "description": rec.get('description', 'Personalized learning recommendation'),
-                    "skill_category": rec.get('skill_category', 'General'),
-                    "recommended_resources": rec.get('recommended_resources', []),
-                    "difficulty_level": rec.get('difficulty_level', 'Intermediate'),
-                    "estimated_hours": rec.get('estimated_hours', 8),
-                    "priority_score": rec.get('priority_score', 75),
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                recommendations.append(recommendation)
+                recommendations.append(self._format_recommendation(rec, idx, user_id))
             
             return recommendations
         except Exception as e:
             print(f"Error parsing AI response: {str(e)}")
             # Fallback recommendations
+            recommendation_fallback_counters["static"] += 1
             return self._fallback_recommendations(user_id)
     
+    def _format_recommendation(self, rec: dict, idx: int, user_id: str) -> dict:
+        # Model output is untrusted: coerce every field to the AIRecommendation
+        # types so a stored set can always be served
+        if not isinstance(rec, dict):
+            rec = {}
+        return {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": self._as_text(rec.get('title'), f'Learning Recommendation {idx + 1}'),
+            "description": self._as_text(rec.get('description'), 'Personalized learning recommendation'),
+            "skill_category": self._as_text(rec.get('skill_category'), 'General'),
+            "recommended_resources": self._as_resources(rec.get('recommended_resources')),
+            "difficulty_level": self._as_text(rec.get('difficulty_level'), 'Intermediate'),
+            "estimated_hours": self._as_int(rec.get('estimated_hours'), 8),
+            "priority_score": self._as_int(rec.get('priority_score'), 75),
+            "created_at": datetime.utcnow().isoformat()
+        }
+    
+    @staticmethod
+    def _as_text(value: Any, default: str) -> str:
+        if value is None or isinstance(value, (dict, list)):
+            return default
+        text = str(value).strip()
+        return text or default
+    
+    @staticmethod
+    def _as_resources(value: Any) -> List[str]:
+        # Resources sometimes come back as {"name": ..., "url": ...} objects or a single string
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            value = [value]
+        resources = []
+        for item in value:
+            if isinstance(item, dict):
+                item = item.get('name') or item.get('title') or item.get('url')
+            if item is not None and not isinstance(item, (dict, list)) and str(item).strip():
+                resources.append(str(item).strip())
+        return resources
+    
+    @staticmethod
+    def _as_int(value: Any, default: int) -> int:
+        # The model sometimes answers 7.5 or "10"; the response model needs an int
+        try:
+            return int(round(float(value)))
+        except (TypeError, ValueError, OverflowError):
+            return default
+    
+    def is_fallback(self, recommendations: List[dict]) -> bool:
+        fallback_titles = {rec["title"] for rec in self._fallback_recommendations("")}
+        return any(rec.get("title") in fallback_titles for rec in recommendations)
+    
+    def local_recommendations(self, user_profile: dict, goals: list, milestones: list) -> List[dict]:
+        """Instant recommendations from the local recommender, padded with the fallback set"""
+        recommendations = self.local.recommend(user_profile, goals, milestones)
+        recommendation_fallback_counters["local"] += 1
+        if len(recommendations) < 5:
+            recommendation_fallback_counters["static"] += 1
+            recommendations += self._fallback_recommendations(user_profile['id'])[:5 - len(recommendations)]
+        return recommendations
+    
     def _fallback_recommendations(self, user_id: str) -> List[dict]:
         """Fallback recommendations if AI fails"""
         fallback_recs = [
@@ -267,9 +1633,74 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def encode_cursor(values: list) -> str:
+    """Opaque keyset pagination cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+# Keyset pagination for per-user lists, newest first on (created_at, id)
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 500
+
+def created_range_filter(created_from: Optional[str], created_to: Optional[str]) -> dict:
+    """created_at bounds from ISO dates or datetimes; a bare date as upper bound includes that whole day"""
+    bounds = {}
+    if created_from:
+        bounds["$gte"] = created_from
+    if created_to:
+        bounds["$lte"] = created_to + "T23:59:59.999999" if len(created_to) == 10 else created_to
+    return {"created_at": bounds} if bounds else {}
+
+async def find_page(collection, query: dict, response: Response, limit: int, after: Optional[str]) -> List[dict]:
+    if after:
+        created_at, item_id = decode_cursor(after, 2)
+        query = {**query, "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": item_id}}
+        ]}
+    
+    items = await collection.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor([items[-1]["created_at"], items[-1]["id"]])
+    return items
+
+# Conditional GETs
+# users.data_version is bumped after every write to a user's goals, milestones
+# or profile. Per-user GET endpoints derive their ETag from it, so a matching
+# If-None-Match is answered with 304 before any of the endpoint's queries run.
+async def bump_data_version(*user_ids: str):
+    await db.users.update_many({"id": {"$in": list(user_ids)}}, {"$inc": {"data_version": 1}})
+
+async def conditional_get(request: Request, response: Response, user_id: str, *extra: str) -> Optional[Response]:
+    """Set the ETag for this request; return a 304 response if the client already has it"""
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "data_version": 1})
+    version = (user or {}).get("data_version", 0)
+    variant = hashlib.sha1("|".join([request.url.path, str(request.url.query), *extra]).encode()).hexdigest()[:16]
+    etag = f'W/"{version}-{variant}"'
+    
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        with span("jwt"):
+            payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -277,11 +1708,363 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def get_current_admin(user_id: str = Depends(get_current_user)):
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "role": 1})
+    if not user or user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user_id
+
+# Monthly rollups
+# One user_month_rollups document per (user_id, month_year) holding hours,
+# milestone_count, teachable_count and a per-source milestone count. Milestone
+# writes keep it current with $inc; rebuild_user_month_rollups recomputes it.
+def rollup_source_key(source: str) -> str:
+    """Escape a learning source so it is usable as a field name under `sources`"""
+    if not source:
+        return "unspecified"
+    return source.replace(".", "\uff0e").replace("$", "\uff04")
+
+def rollup_source_name(key: str) -> str:
+    return key.replace("\uff0e", ".").replace("\uff04", "$")
+
+def rollup_increments(milestone: dict, sign: int = 1) -> dict:
+    """$inc document adding (sign=1) or removing (sign=-1) a milestone"""
+    return {
+        "hours": sign * milestone.get("hours_invested", 0),
+        "milestone_count": sign,
+        "teachable_count": sign if milestone.get("can_teach_others") else 0,
+        f"sources.{rollup_source_key(milestone.get('learning_source', ''))}": sign
+    }
+
+async def apply_rollup_increments(user_id: str, month_year: str, increments: dict):
+    increments = {field: value for field, value in increments.items() if value}
+    if not increments:
+        return
+    await db.user_month_rollups.update_one(
+        {"user_id": user_id, "month_year": month_year},
+        {"$inc": increments, "$set": {"updated_at": datetime.utcnow().isoformat()}},
+        upsert=True
+    )
+
+async def rollup_milestone_change(before: Optional[dict], after: Optional[dict]):
+    """Move a milestone's contribution from `before` to `after` (either may be None)"""
+    changes: Dict[tuple, Dict[str, float]] = {}
+    for milestone, sign in ((before, -1), (after, 1)):
+        if not milestone:
+            continue
+        key = (milestone["user_id"], milestone["month_year"])
+        bucket = changes.setdefault(key, {})
+        for field, value in rollup_increments(milestone, sign).items():
+            bucket[field] = bucket.get(field, 0) + value
+    for (user_id, month_year), increments in changes.items():
+        await apply_rollup_increments(user_id, month_year, increments)
+
+async def rollup_milestones_bulk(milestones: List[dict]):
+    """Add many new milestones to the rollups with one bulk write"""
+    changes: Dict[tuple, Dict[str, float]] = {}
+    for milestone in milestones:
+        bucket = changes.setdefault((milestone["user_id"], milestone["month_year"]), {})
+        for field, value in rollup_increments(milestone).items():
+            bucket[field] = bucket.get(field, 0) + value
+    if not changes:
+        return
+    updated_at = datetime.utcnow().isoformat()
+    await db.user_month_rollups.bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "month_year": month_year},
+            {"$inc": increments, "$set": {"updated_at": updated_at}},
+            upsert=True
+        )
+        for (user_id, month_year), increments in changes.items()
+    ], ordered=False)
+
+def rollup_progress(rollup: Optional[dict]) -> dict:
+    rollup = rollup or {}
+    return {
+        "hours": rollup.get("hours", 0),
+        "milestone_count": rollup.get("milestone_count", 0),
+        "teachable_count": rollup.get("teachable_count", 0),
+        "sources_used": sorted(
+            rollup_source_name(key) for key, count in rollup.get("sources", {}).items() if count > 0
+        )
+    }
+
+async def rebuild_user_month_rollups(user_id: Optional[str] = None) -> int:
+    """Recompute rollups from raw milestones, for one user or everyone"""
+    rebuilt_at = datetime.utcnow().isoformat()
+    match = {"user_id": user_id} if user_id else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "month_year": "$month_year", "source": "$learning_source"},
+            "hours": {"$sum": "$hours_invested"},
+            "milestone_count": {"$sum": 1},
+            "teachable_count": {"$sum": {"$cond": ["$can_teach_others", 1, 0]}}
+        }}
+    ]
+    rollups: Dict[tuple, dict] = {}
+    async for group in db.milestones.aggregate(pipeline, allowDiskUse=True):
+        key = (group["_id"]["user_id"], group["_id"]["month_year"])
+        rollup = rollups.setdefault(key, {
+            "user_id": key[0],
+            "month_year": key[1],
+            "hours": 0,
+            "milestone_count": 0,
+            "teachable_count": 0,
+            "sources": {},
+            "updated_at": rebuilt_at
+        })
+        rollup["hours"] += group["hours"]
+        rollup["milestone_count"] += group["milestone_count"]
+        rollup["teachable_count"] += group["teachable_count"]
+        source_key = rollup_source_key(group["_id"].get("source") or "")
+        rollup["sources"][source_key] = rollup["sources"].get(source_key, 0) + group["milestone_count"]
+
+    operations = [
+        ReplaceOne({"user_id": r["user_id"], "month_year": r["month_year"]}, r, upsert=True)
+        for r in rollups.values()
+    ]
+    for i in range(0, len(operations), 1000):
+        await db.user_month_rollups.bulk_write(operations[i:i + 1000], ordered=False)
+
+    # Anything not touched by this rebuild no longer has milestones behind it
+    await db.user_month_rollups.delete_many({**match, "updated_at": {"$lt": rebuilt_at}})
+    return len(rollups)
+
+# Resource directory
+# resource_directory holds one document per learning source with a stable id;
+# resource_skills counts each (source, skill) pair so skills_taught can be kept
+# as a bounded top-k list. Both are maintained on milestone writes.
+RESOURCE_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "resources.learning-tracker")
+RESOURCE_TOP_SKILLS = 5
+RESOURCE_PAGE_SIZE = 50
+RESOURCE_MAX_PAGE_SIZE = 200
+
+def resource_id_for(source: str) -> str:
+    return str(uuid.uuid5(RESOURCE_NAMESPACE, source or ""))
+
+def resource_skill_key(what_learned: str) -> str:
+    return " ".join((what_learned or "").lower().split())
+
+async def refresh_resource_top_skills(resource_id: str):
+    top_skills = await db.resource_skills.find(
+        {"resource_id": resource_id, "count": {"$gt": 0}},
+        {"_id": 0, "skill": 1}
+    ).sort([("count", -1), ("skill_key", 1)]).limit(RESOURCE_TOP_SKILLS).to_list(length=RESOURCE_TOP_SKILLS)
+    await db.resource_directory.update_one(
+        {"id": resource_id},
+        {"$set": {"skills_taught": [s["skill"] for s in top_skills]}}
+    )
+    # Every resource write ends here, so cached pages are dropped once it is complete
+    invalidate_resource_page_cache()
+
+async def apply_resource_increments(milestone: dict, sign: int):
+    source = milestone.get("learning_source", "")
+    resource_id = resource_id_for(source)
+    await db.resource_directory.update_one(
+        {"id": resource_id},
+        {
+            "$inc": {"usage_count": sign, "total_hours": sign * milestone.get("hours_invested", 0)},
+            "$set": {"updated_at": datetime.utcnow().isoformat()},
+            "$setOnInsert": {"name": source, "category": "auto-generated", "skills_taught": []}
+        },
+        upsert=True
+    )
+    
+    skill_key = resource_skill_key(milestone.get("what_learned", ""))
+    if skill_key:
+        await db.resource_skills.update_one(
+            {"resource_id": resource_id, "skill_key": skill_key},
+            {"$inc": {"count": sign}, "$setOnInsert": {"skill": milestone["what_learned"].strip()}},
+            upsert=True
+        )
+        if sign < 0:
+            await db.resource_skills.delete_many({"resource_id": resource_id, "count": {"$lte": 0}})
+    
+    if sign < 0:
+        await db.resource_directory.delete_one({"id": resource_id, "usage_count": {"$lte": 0}})
+    await refresh_resource_top_skills(resource_id)
+
+async def resource_milestones_bulk(milestones: List[dict]):
+    """Add many new milestones to the resource directory with bulk writes"""
+    resources: Dict[str, dict] = {}
+    skills: Dict[tuple, dict] = {}
+    for milestone in milestones:
+        source = milestone.get("learning_source", "")
+        resource_id = resource_id_for(source)
+        resource = resources.setdefault(resource_id, {"name": source, "usage_count": 0, "total_hours": 0})
+        resource["usage_count"] += 1
+        resource["total_hours"] += milestone.get("hours_invested", 0)
+        
+        skill_key = resource_skill_key(milestone.get("what_learned", ""))
+        if skill_key:
+            skill = skills.setdefault((resource_id, skill_key), {"skill": milestone["what_learned"].strip(), "count": 0})
+            skill["count"] += 1
+    if not resources:
+        return
+    
+    updated_at = datetime.utcnow().isoformat()
+    await db.resource_directory.bulk_write([
+        UpdateOne(
+            {"id": resource_id},
+            {
+                "$inc": {"usage_count": r["usage_count"], "total_hours": r["total_hours"]},
+                "$set": {"updated_at": updated_at},
+                "$setOnInsert": {"name": r["name"], "category": "auto-generated", "skills_taught": []}
+            },
+            upsert=True
+        )
+        for resource_id, r in resources.items()
+    ], ordered=False)
+    if skills:
+        await db.resource_skills.bulk_write([
+            UpdateOne(
+                {"resource_id": resource_id, "skill_key": skill_key},
+                {"$inc": {"count": s["count"]}, "$setOnInsert": {"skill": s["skill"]}},
+                upsert=True
+            )
+            for (resource_id, skill_key), s in skills.items()
+        ], ordered=False)
+    for resource_id in resources:
+        await refresh_resource_top_skills(resource_id)
+
+async def resource_milestone_change(before: Optional[dict], after: Optional[dict]):
+    """Move a milestone's contribution in the resource directory from `before` to `after`"""
+    if before and after and \
+            before.get("learning_source") == after.get("learning_source") and \
+            before.get("what_learned") == after.get("what_learned") and \
+            before.get("hours_invested") == after.get("hours_invested"):
+        return
+    if before:
+        await apply_resource_increments(before, -1)
+    if after:
+        await apply_resource_increments(after, 1)
+
+async def rebuild_resource_directory() -> int:
+    """Recompute the resource directory and skill counts from raw milestones"""
+    rebuilt_at = datetime.utcnow().isoformat()
+    
+    resources = {}
+    async for group in db.milestones.aggregate([
+        {"$group": {
+            "_id": "$learning_source",
+            "usage_count": {"$sum": 1},
+            "total_hours": {"$sum": "$hours_invested"}
+        }}
+    ], allowDiskUse=True):
+        source = group["_id"] or ""
+        resources[resource_id_for(source)] = {
+            "id": resource_id_for(source),
+            "name": source,
+            "usage_count": group["usage_count"],
+            "total_hours": group["total_hours"],
+            "skills_taught": [],
+            "category": "auto-generated",
+            "updated_at": rebuilt_at
+        }
+    
+    skill_operations = []
+    async for group in db.milestones.aggregate([
+        {"$group": {
+            "_id": {"source": "$learning_source", "skill": "$what_learned"},
+            "count": {"$sum": 1}
+        }}
+    ], allowDiskUse=True):
+        skill_key = resource_skill_key(group["_id"].get("skill") or "")
+        if not skill_key:
+            continue
+        skill_operations.append(UpdateOne(
+            {"resource_id": resource_id_for(group["_id"].get("source") or ""), "skill_key": skill_key},
+            {"$inc": {"count": group["count"]}, "$setOnInsert": {"skill": group["_id"]["skill"].strip()}},
+            upsert=True
+        ))
+    
+    await db.resource_skills.delete_many({})
+    for i in range(0, len(skill_operations), 1000):
+        await db.resource_skills.bulk_write(skill_operations[i:i + 1000], ordered=False)
+    
+    directory_operations = [ReplaceOne({"id": r["id"]}, r, upsert=True) for r in resources.values()]
+    for i in range(0, len(directory_operations), 1000):
+        await db.resource_directory.bulk_write(directory_operations[i:i + 1000], ordered=False)
+    await db.resource_directory.delete_many({"updated_at": {"$lt": rebuilt_at}})
+    
+    for resource_id in resources:
+        await refresh_resource_top_skills(resource_id)
+    invalidate_resource_page_cache()
+    return len(resources)
+
+# Health / diagnostics
+@app.get("/api/health")
+async def health():
+    try:
+        await db.command("ping")
+        database = "ok"
+    except Exception as e:
+        database = f"error: {str(e)}"
+
+    indexes_ok = bool(index_status) and all(
+        not state.startswith("error")
+        for statuses in index_status.values()
+        for state in statuses.values()
+    )
+    return {
+        "status": "ok" if database == "ok" and indexes_ok else "degraded",
+        "database": database,
+        "indexes": index_status,
+        "llm": llm_metrics(),
+        "local_recommender": ai_service.local.snapshot(),
+        "shared_cache": await shared_cache_metrics(),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    mongo_command_metrics.drain()
+    
+    caches = {
+        "recommendations": recommendation_cache_counters,
+        "shared_recommendations": shared_cache_counters,
+        "resource_pages": resource_page_cache_counters
+    }
+    cache_lookups = {}
+    cache_hit_ratio = {}
+    for cache, counters in caches.items():
+        lookups = counters["hits"] + counters["misses"]
+        cache_lookups[(cache, "hit")] = counters["hits"]
+        cache_lookups[(cache, "miss")] = counters["misses"]
+        cache_hit_ratio[(cache,)] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+    
+    lines = []
+    lines += http_request_histogram.render()
+    lines += metric_lines("http_requests_in_flight", "Requests currently being handled", "gauge", (), {(): http_in_flight["requests"]})
+    lines += mongo_command_histogram.render()
+    lines += llm_latency_histogram.render()
+    lines += metric_lines("llm_calls_total", "LLM calls attempted, by outcome", "counter", ("outcome",), {
+        (outcome,): llm_counters[outcome] for outcome in ("successes", "failures", "timeouts", "rejected")
+    })
+    lines += metric_lines("llm_tokens_total", "Estimated LLM tokens, by route and model", "counter", ("route", "model", "kind"), {
+        (*key.split(":", 1), kind): stats[f"{kind}_tokens"]
+        for key, stats in llm_route_stats.items()
+        for kind in ("prompt", "completion")
+    })
+    lines += metric_lines("llm_circuit_open", "1 while the LLM circuit breaker is open", "gauge", (), {
+        (): 1 if llm_breaker.snapshot()["state"] == "open" else 0
+    })
+    limiter = llm_limiter.snapshot()
+    lines += metric_lines("llm_limiter_in_flight", "LLM calls holding a concurrency slot", "gauge", (), {(): limiter["in_flight"]})
+    lines += metric_lines("llm_limiter_queue_depth", "Callers waiting for an LLM slot", "gauge", (), {(): limiter["queue_depth"]})
+    lines += metric_lines("recommendation_fallbacks_total", "Recommendation sets served without the LLM", "counter", ("kind",), {
+        (kind,): count for kind, count in recommendation_fallback_counters.items()
+    })
+    lines += metric_lines("cache_lookups_total", "Cache lookups by result", "counter", ("cache", "result"), cache_lookups)
+    lines += metric_lines("cache_hit_ratio", "Cache hits over lookups since start", "gauge", ("cache",), cache_hit_ratio)
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Auth endpoints
 @app.post("/api/register")
 async def register(user: UserRegister):
     # Check if user exists
-    if db.users.find_one({"email": user.email}):
+    if await db.users.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_id = str(uuid.uuid4())
@@ -300,7 +2083,11 @@ async def register(user: UserRegister):
         "created_at": datetime.utcnow().isoformat()
     }
     
-    db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration; the unique email index decides
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     access_token = create_access_token(data={"sub": user_id})
     return {"access_token": access_token, "token_type": "bearer", "user": {
@@ -312,7 +2099,7 @@ async def register(user: UserRegister):
 
 @app.post("/api/login")
 async def login(user: UserLogin):
-    db_user = db.users.find_one({"email": user.email})
+    db_user = await db.users.find_one({"email": user.email})
     if not db_user or not verify_password(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -325,75 +2112,103 @@ async def login(user: UserLogin):
     }}
 
 # User profile endpoints
-@app.get("/api/profile")
-async def get_profile(user_id: str = Depends(get_current_user)):
-    user = db.users.find_one({"id": user_id}, {"password": 0})
+@app.get("/api/profile", response_model=UserProfile)
+async def get_profile(request: Request, response: Response, user_id: str = Depends(get_current_user)):
+    not_modified = await conditional_get(request, response, user_id)
+    if not_modified:
+        return not_modified
+    
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0, "data_version": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Remove MongoDB ObjectId
-    user.pop("_id", None)
     return user
 
 @app.put("/api/profile")
-async def update_profile(profile_data: dict, user_id: str = Depends(get_current_user)):
-    # Remove sensitive fields
-    profile_data.pop("password", None)
-    profile_data.pop("id", None)
-    profile_data.pop("email", None)
+async def update_profile(profile: ProfileUpdate, user_id: str = Depends(get_current_user)):
+    # Unknown fields (role, email, password, ...) are ignored by the model
+    profile_data = {
+        key: value for key, value in profile.model_dump(exclude_unset=True).items()
+        # null can only clear the optional picture; the other fields are required on a profile
+        if value is not None or key == "profile_picture"
+    }
     
-    db.users.update_one({"id": user_id}, {"$set": profile_data})
+    update = {"$inc": {"data_version": 1}}
+    if profile_data:
+        update["$set"] = profile_data
+    await db.users.update_one({"id": user_id}, update)
     return {"message": "Profile updated successfully"}
 
 # Goals endpoints
-@app.post("/api/goals")
-async def create_goal(goal: GoalCreate, user_id: str = Depends(get_current_user)):
-    goal_id = str(uuid.uuid4())
-    goal_doc = {
-        "id": goal_id,
+def build_goal_doc(goal: GoalCreate, user_id: str, created_at: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
         "user_id": user_id,
         "title": goal.title,
         "description": goal.description,
         "target_completion": goal.target_completion,
         "status": "active",
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": created_at.isoformat()
     }
+
+@app.post("/api/goals", response_model=LearningGoal)
+async def create_goal(goal: GoalCreate, user_id: str = Depends(get_current_user)):
+    goal_doc = build_goal_doc(goal, user_id, datetime.utcnow())
     
-    db.goals.insert_one(goal_doc)
-    goal_doc.pop("_id", None)
+    # insert_one adds _id to goal_doc; the response model leaves it out
+    await db.goals.insert_one(goal_doc)
+    await bump_data_version(user_id)
     return goal_doc
 
-@app.get("/api/goals")
-async def get_user_goals(user_id: str = Depends(get_current_user)):
-    goals = list(db.goals.find({"user_id": user_id}, {"_id": 0}))
+@app.get("/api/goals", response_model=List[LearningGoal])
+async def get_user_goals(
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user),
+    status: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    after: Optional[str] = None
+):
+    not_modified = await conditional_get(request, response, user_id)
+    if not_modified:
+        return not_modified
+    
+    query = {"user_id": user_id, **created_range_filter(created_from, created_to)}
+    if status:
+        query["status"] = status
+    
+    goals = await find_page(db.goals, query, response, limit, after)
     return goals
 
 @app.put("/api/goals/{goal_id}")
-async def update_goal(goal_id: str, goal_data: dict, user_id: str = Depends(get_current_user)):
-    result = db.goals.update_one(
+async def update_goal(goal_id: str, goal: GoalUpdate, user_id: str = Depends(get_current_user)):
+    # Only typed, editable fields: user_id and created_at key ownership and the list cursor
+    goal_data = {key: value for key, value in goal.model_dump(exclude_unset=True).items() if value is not None}
+    if not goal_data:
+        raise HTTPException(status_code=400, detail="No goal fields to update")
+    
+    result = await db.goals.update_one(
         {"id": goal_id, "user_id": user_id},
         {"$set": goal_data}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Goal not found")
+    await bump_data_version(user_id)
     return {"message": "Goal updated successfully"}
 
 @app.delete("/api/goals/{goal_id}")
 async def delete_goal(goal_id: str, user_id: str = Depends(get_current_user)):
-    result = db.goals.delete_one({"id": goal_id, "user_id": user_id})
+    result = await db.goals.delete_one({"id": goal_id, "user_id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Goal not found")
+    await bump_data_version(user_id)
     return {"message": "Goal deleted successfully"}
 
 # Milestones endpoints
-@app.post("/api/milestones")
-async def create_milestone(milestone: MilestoneCreate, user_id: str = Depends(get_current_user)):
-    milestone_id = str(uuid.uuid4())
-    current_date = datetime.utcnow()
-    month_year = current_date.strftime("%Y-%m")
-    
-    milestone_doc = {
-        "id": milestone_id,
+def build_milestone_doc(milestone: MilestoneCreate, user_id: str, created_at: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
         "goal_id": milestone.goal_id,
         "user_id": user_id,
         "what_learned": milestone.what_learned,
@@ -401,29 +2216,65 @@ async def create_milestone(milestone: MilestoneCreate, user_id: str = Depends(ge
         "can_teach_others": milestone.can_teach_others,
         "hours_invested": milestone.hours_invested,
         "project_certificate_link": milestone.project_certificate_link,
-        "created_at": current_date.isoformat(),
-        "month_year": month_year
+        "created_at": created_at.isoformat(),
+        "month_year": created_at.strftime("%Y-%m")
     }
+
+@app.post("/api/milestones", response_model=Milestone)
+async def create_milestone(milestone: MilestoneCreate, user_id: str = Depends(get_current_user)):
+    milestone_doc = build_milestone_doc(milestone, user_id, datetime.utcnow())
     
-    db.milestones.insert_one(milestone_doc)
-    milestone_doc.pop("_id", None)
+    # insert_one adds _id to milestone_doc; the response model leaves it out
+    await db.milestones.insert_one(milestone_doc)
+    await rollup_milestone_change(None, milestone_doc)
+    await resource_milestone_change(None, milestone_doc)
+    await bump_data_version(user_id)
     return milestone_doc
 
-@app.get("/api/milestones")
-async def get_user_milestones(user_id: str = Depends(get_current_user), month: Optional[str] = None):
-    query = {"user_id": user_id}
+@app.get("/api/milestones", response_model=List[Milestone])
+async def get_user_milestones(
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user),
+    month: Optional[str] = None,
+    goal_id: Optional[str] = None,
+    can_teach_others: Optional[bool] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    after: Optional[str] = None
+):
+    not_modified = await conditional_get(request, response, user_id)
+    if not_modified:
+        return not_modified
+    
+    query = {"user_id": user_id, **created_range_filter(created_from, created_to)}
     if month:
         query["month_year"] = month
+    if goal_id:
+        query["goal_id"] = goal_id
+    if can_teach_others is not None:
+        query["can_teach_others"] = can_teach_others
     
-    milestones = list(db.milestones.find(query, {"_id": 0}))
+    milestones = await find_page(db.milestones, query, response, limit, after)
     return milestones
 
-@app.get("/api/milestones/current-month")
-async def get_current_month_progress(user_id: str = Depends(get_current_user)):
+@app.get("/api/milestones/current-month", response_model=MonthProgress)
+async def get_current_month_progress(request: Request, response: Response, user_id: str = Depends(get_current_user)):
     current_month = datetime.utcnow().strftime("%Y-%m")
-    milestones = list(db.milestones.find({"user_id": user_id, "month_year": current_month}, {"_id": 0}))
+    not_modified = await conditional_get(request, response, user_id, current_month)
+    if not_modified:
+        return not_modified
     
-    total_hours = sum(m["hours_invested"] for m in milestones)
+    rollup, milestones = await asyncio.gather(
+        db.user_month_rollups.find_one({"user_id": user_id, "month_year": current_month}, {"_id": 0}),
+        db.milestones.find({"user_id": user_id, "month_year": current_month}, {"_id": 0}).to_list(length=None)
+    )
+    return current_month_progress(rollup, milestones, current_month)
+
+def current_month_progress(rollup: Optional[dict], milestones: List[dict], current_month: str) -> dict:
+    progress = rollup_progress(rollup)
+    total_hours = progress["hours"]
     target_hours = 6
     progress_percentage = min((total_hours / target_hours) * 100, 100)
     
@@ -431,121 +2282,1056 @@ async def get_current_month_progress(user_id: str = Depends(get_current_user)):
         "total_hours": total_hours,
         "target_hours": target_hours,
         "progress_percentage": progress_percentage,
+        "milestone_count": progress["milestone_count"],
+        "teachable_count": progress["teachable_count"],
+        "sources_used": progress["sources_used"],
         "milestones": milestones,
         "month_year": current_month
     }
 
 @app.put("/api/milestones/{milestone_id}")
-async def update_milestone(milestone_id: str, milestone_data: dict, user_id: str = Depends(get_current_user)):
-    result = db.milestones.update_one(
+async def update_milestone(milestone_id: str, milestone: MilestoneUpdate, user_id: str = Depends(get_current_user)):
+    # Validated before the write so the rollups only ever see typed values; ownership
+    # and timestamp fields are not part of the model, they key the rollups
+    milestone_data = {
+        key: value for key, value in milestone.model_dump(exclude_unset=True).items()
+        # null can only clear the optional link
+        if value is not None or key == "project_certificate_link"
+    }
+    if not milestone_data:
+        raise HTTPException(status_code=400, detail="No milestone fields to update")
+    
+    before = await db.milestones.find_one_and_update(
         {"id": milestone_id, "user_id": user_id},
-        {"$set": milestone_data}
+        {"$set": milestone_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Milestone not found")
+    after = {**before, **milestone_data}
+    await rollup_milestone_change(before, after)
+    await resource_milestone_change(before, after)
+    await bump_data_version(user_id)
     return {"message": "Milestone updated successfully"}
 
 @app.delete("/api/milestones/{milestone_id}")
 async def delete_milestone(milestone_id: str, user_id: str = Depends(get_current_user)):
-    result = db.milestones.delete_one({"id": milestone_id, "user_id": user_id})
-    if result.deleted_count == 0:
+    deleted = await db.milestones.find_one_and_delete(
+        {"id": milestone_id, "user_id": user_id},
+        projection={"_id": 0}
+    )
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Milestone not found")
+    await rollup_milestone_change(deleted, None)
+    await resource_milestone_change(deleted, None)
+    await bump_data_version(user_id)
     return {"message": "Milestone deleted successfully"}
 
+# Bulk import endpoints
+# NDJSON or CSV uploads are validated row by row against the create models and
+# written with unordered insert_many in chunks; derived rollups are updated in
+# bulk per chunk. Optional columns: created_at (to replay past learning) and,
+# for admins, user_id.
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+IMPORT_MODELS = {"milestones": MilestoneCreate, "goals": GoalCreate}
+
+def is_utf8(stream, block_size: int = 1 << 16) -> bool:
+    """Decode the whole upload once without keeping it, then rewind"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        while True:
+            block = stream.read(block_size)
+            decoder.decode(block, final=not block)
+            if not block:
+                return True
+    except UnicodeDecodeError:
+        return False
+    finally:
+        stream.seek(0)
+
+def import_rows(upload: UploadFile, import_format: str):
+    """Yield (row_number, raw_row) from an uploaded NDJSON or CSV file without loading it whole"""
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    if import_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            # Empty cells mean "not provided"
+            yield row_number, {k: (v if v != "" else None) for k, v in row.items() if k}
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, e
+
+def parse_import_created_at(value: Any) -> datetime:
+    if not value:
+        return datetime.utcnow()
+    created_at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if created_at.tzinfo is not None:
+        # Stored timestamps are naive UTC; convert before dropping the offset
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
+
+def read_import_chunk(rows, dataset: str, import_format: str, user_id: str, is_admin: bool):
+    """Parse and validate the next IMPORT_CHUNK_SIZE rows; runs in a worker thread.
+
+    Returns (received, [(row_number, doc)], [(row_number, messages)]); received
+    is 0 once the upload is exhausted.
+    """
+    model = IMPORT_MODELS[dataset]
+    received = 0
+    docs = []
+    rejected = []
+    for row_number, row in rows:
+        received += 1
+        owner_id = (row.get("user_id") or user_id) if isinstance(row, dict) else None
+        if owner_id is None:
+            rejected.append((row_number, [f"Invalid {import_format.upper()} row"]))
+        elif not isinstance(owner_id, str):
+            rejected.append((row_number, ["user_id: must be a string"]))
+        elif owner_id != user_id and not is_admin:
+            rejected.append((row_number, ["Only admins can import rows for other users"]))
+        else:
+            try:
+                validated = model(**row)
+                created_at = parse_import_created_at(row.get("created_at"))
+                build_doc = build_milestone_doc if dataset == "milestones" else build_goal_doc
+                docs.append((row_number, build_doc(validated, owner_id, created_at)))
+            except ValidationError as e:
+                rejected.append((row_number, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]))
+            except ValueError:
+                rejected.append((row_number, ["created_at: invalid ISO date"]))
+        if received >= IMPORT_CHUNK_SIZE:
+            break
+    return received, docs, rejected
+
+@app.post("/api/import/{dataset}")
+async def import_dataset(
+    dataset: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    user_id: str = Depends(get_current_user)
+):
+    """Bulk import milestones or goals from an NDJSON or CSV upload"""
+    if dataset not in IMPORT_MODELS:
+        raise HTTPException(status_code=404, detail="Unknown dataset")
+    import_format = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    if import_format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    
+    importer = await db.users.find_one({"id": user_id}, {"_id": 0, "role": 1})
+    is_admin = bool(importer) and importer.get("role") == "admin"
+    collection = db[dataset]
+    
+    errors = []
+    failed = 0
+    received = 0
+    inserted = 0
+    
+    def report(row_number: int, messages: List[str]):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "errors": messages})
+    
+    async def flush(chunk: List[Tuple[int, dict]]):
+        nonlocal inserted
+        docs = [doc for _, doc in chunk]
+        failed_indexes = set()
+        try:
+            await collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed_indexes.add(write_error["index"])
+                report(chunk[write_error["index"]][0], [write_error.get("errmsg", "Write failed")])
+        written = [doc for i, doc in enumerate(docs) if i not in failed_indexes]
+        inserted += len(written)
+        if written:
+            await bump_data_version(*{doc["user_id"] for doc in written})
+        if dataset == "milestones" and written:
+            await rollup_milestones_bulk(written)
+            await resource_milestones_bulk(written)
+    
+    # Checked up front: a decode error mid-file would leave earlier chunks committed
+    if not await asyncio.to_thread(is_utf8, file.file):
+        raise HTTPException(status_code=400, detail="Upload must be UTF-8 encoded")
+    
+    # Parsing and validation run off the event loop, one chunk at a time
+    rows = import_rows(file, import_format)
+    known_users = {user_id}
+    while True:
+        chunk_received, chunk, rejected = await asyncio.to_thread(
+            read_import_chunk, rows, dataset, import_format, user_id, is_admin
+        )
+        if not chunk_received:
+            break
+        received += chunk_received
+        for row_number, messages in rejected:
+            report(row_number, messages)
+        
+        # Admin rows may target other users; only existing ones
+        other_users = {doc["user_id"] for _, doc in chunk} - known_users
+        if other_users:
+            known_users.update(await db.users.distinct("id", {"id": {"$in": list(other_users)}}))
+            for row_number, doc in chunk:
+                if doc["user_id"] not in known_users:
+                    report(row_number, [f"user_id: no user {doc['user_id']}"])
+            chunk = [(row_number, doc) for row_number, doc in chunk if doc["user_id"] in known_users]
+        
+        if chunk:
+            await flush(chunk)
+    
+    return {
+        "dataset": dataset,
+        "received": received,
+        "inserted": inserted,
+        "failed": failed,
+        # Rows rejected after parsing (unknown users, write errors) are reported late
+        "errors": sorted(errors, key=lambda error: error["row"])
+    }
+
 # AI Recommendations endpoints
-@app.get("/api/ai-recommendations")
-async def get_ai_recommendations(user_id: str = Depends(get_current_user)):
-    """Get personalized AI learning recommendations"""
+# ai_recommendations holds one document per user: the current set under
+# `recommendations` with its version, context_fingerprint and generated_at, and
+# the previous RECOMMENDATION_HISTORY_SIZE generations under `history`.
+
+# Only the fields recommendation generation reads
+RECOMMENDATION_PROFILE_FIELDS = {
+    "_id": 0, "id": 1, "full_name": 1, "position": 1, "department": 1,
+    "date_of_joining": 1, "existing_skills": 1, "learning_interests": 1
+}
+RECOMMENDATION_GOAL_FIELDS = {"_id": 0, "title": 1, "status": 1}
+RECOMMENDATION_MILESTONE_FIELDS = {"_id": 0, "what_learned": 1, "learning_source": 1, "hours_invested": 1}
+RECOMMENDATION_MILESTONE_LIMIT = 10
+
+async def load_recommendation_context(user_id: str) -> Tuple[Optional[dict], list, list]:
+    """Profile, active goals and the newest milestones (oldest first), read concurrently"""
+    with span("context_load"):
+        user_profile, goals, milestones = await asyncio.gather(
+            db.users.find_one({"id": user_id}, RECOMMENDATION_PROFILE_FIELDS),
+            db.goals.find({"user_id": user_id, "status": "active"}, RECOMMENDATION_GOAL_FIELDS).to_list(length=None),
+            db.milestones.find({"user_id": user_id}, RECOMMENDATION_MILESTONE_FIELDS)
+                .sort([("created_at", -1)])
+                .limit(RECOMMENDATION_MILESTONE_LIMIT)
+                .to_list(length=RECOMMENDATION_MILESTONE_LIMIT)
+        )
+    # Chronological order, so milestones[-n:] are the most recent n
+    milestones.reverse()
+    return user_profile, goals, milestones
+
+recommendation_cache_counters = {"hits": 0, "misses": 0}
+
+async def get_cached_recommendations(user_id: str, fingerprint: str) -> List[dict]:
+    """Stored recommendations for this exact context that are still within the TTL"""
+    fresh_after = (datetime.utcnow() - RECOMMENDATION_CACHE_TTL).isoformat()
+    stored = await db.ai_recommendations.find_one(
+        {"user_id": user_id, "context_fingerprint": fingerprint, "generated_at": {"$gte": fresh_after}},
+        {"_id": 0, "recommendations": 1}
+    )
+    recommendation_cache_counters["hits" if stored else "misses"] += 1
+    return stored["recommendations"] if stored else []
+
+async def get_stored_recommendations(user_id: str) -> List[dict]:
+    """Last stored recommendations regardless of freshness"""
+    stored = await db.ai_recommendations.find_one({"user_id": user_id}, {"_id": 0, "recommendations": 1})
+    return stored["recommendations"] if stored else []
+
+async def store_recommendations(user_id: str, fingerprint: str, recommendations: List[dict]):
+    """Swap in a new set in one atomic write, pushing the current one onto the bounded history"""
+    previous = {
+        "version": "$version",
+        "context_fingerprint": "$context_fingerprint",
+        "generated_at": "$generated_at",
+        "recommendations": "$recommendations"
+    }
+    await db.ai_recommendations.update_one(
+        {"user_id": user_id},
+        [{"$set": {
+            "history": {"$slice": [
+                {"$concatArrays": [
+                    {"$cond": [{"$ifNull": ["$recommendations", False]}, [previous], []]},
+                    {"$ifNull": ["$history", []]}
+                ]},
+                RECOMMENDATION_HISTORY_SIZE
+            ]},
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+            "context_fingerprint": {"$literal": fingerprint},
+            "generated_at": {"$literal": datetime.utcnow().isoformat()},
+            # $literal: generated text may contain "$"
+            "recommendations": {"$literal": recommendations}
+        }}],
+        upsert=True
+    )
+
+# Cross-user recommendation cache
+# Generated sets are shared between users with the same profile_signature and
+# re-stamped per user on reuse. Only sets generated from a shareable context
+# (no goals or milestones, so the prompt holds just the signature fields) are
+# stored, never one built from a colleague's name or progress. Entries expire SHARED_CACHE_TTL after creation
+# and the least recently used ones are evicted beyond SHARED_CACHE_MAX_ENTRIES.
+shared_cache_counters = {"hits": 0, "misses": 0}
+
+async def get_shared_recommendations(signature: str, user_id: str) -> List[dict]:
+    now = datetime.utcnow()
+    entry = await db.shared_recommendation_cache.find_one_and_update(
+        {"signature": signature, "expires_at": {"$gt": now}},
+        {"$inc": {"hits": 1}, "$set": {"last_used_at": now}},
+        projection={"_id": 0, "recommendations": 1}
+    )
+    if not entry:
+        shared_cache_counters["misses"] += 1
+        return []
+    
+    shared_cache_counters["hits"] += 1
+    created_at = now.isoformat()
+    return [
+        {**rec, "id": str(uuid.uuid4()), "user_id": user_id, "created_at": created_at}
+        for rec in entry["recommendations"]
+    ]
+
+async def store_shared_recommendations(signature: str, recommendations: List[dict]):
+    now = datetime.utcnow()
+    templates = [{k: v for k, v in rec.items() if k not in ("id", "user_id", "created_at")} for rec in recommendations]
+    await db.shared_recommendation_cache.update_one(
+        {"signature": signature},
+        {"$set": {"recommendations": templates, "last_used_at": now, "expires_at": now + SHARED_CACHE_TTL},
+         "$setOnInsert": {"created_at": now.isoformat(), "hits": 0}},
+        upsert=True
+    )
+    
+    overflow = await db.shared_recommendation_cache.estimated_document_count() - SHARED_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        oldest = await db.shared_recommendation_cache.find({}, {"_id": 1}).sort(
+            [("last_used_at", 1)]
+        ).limit(overflow).to_list(length=overflow)
+        await db.shared_recommendation_cache.delete_many({"_id": {"$in": [e["_id"] for e in oldest]}})
+
+async def shared_cache_metrics() -> dict:
+    lookups = shared_cache_counters["hits"] + shared_cache_counters["misses"]
     try:
-        # Get user profile, goals, and milestones
-        user_profile = db.users.find_one({"id": user_id}, {"password": 0, "_id": 0})
-        goals = list(db.goals.find({"user_id": user_id}, {"_id": 0}))
-        milestones = list(db.milestones.find({"user_id": user_id}, {"_id": 0}).sort([("created_at", -1)]))
+        entries = await db.shared_recommendation_cache.estimated_document_count()
+    except Exception:
+        entries = None
+    return {
+        **shared_cache_counters,
+        "hit_rate": round(shared_cache_counters["hits"] / lookups, 4) if lookups else 0.0,
+        # Every hit is one LLM completion we did not pay for
+        "llm_calls_saved": shared_cache_counters["hits"],
+        "entries": entries,
+        "max_entries": SHARED_CACHE_MAX_ENTRIES
+    }
+
+async def recommendations_for_user(
+    user_id: str,
+    force_refresh: bool = False,
+    context: Optional[Tuple[Optional[dict], list, list]] = None,
+    inline: bool = True
+) -> Tuple[List[dict], Optional[dict]]:
+    """Stale-while-revalidate recommendations.
+
+    Returns the recommendations plus, when they are stale, the background job
+    enqueued to regenerate them. The LLM is only called inline when there is
+    nothing stored yet or on an explicit refresh; with inline=False it never
+    is, and the local/fallback set is returned while the job generates.
+    Callers that already hold the profile, active goals and newest milestones
+    can pass them as `context`.
+    """
+    user_profile = None
+    try:
+        user_profile, goals, milestones = context or await load_recommendation_context(user_id)
         
         if not user_profile:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Generate recommendations using AI
-        recommendations = await ai_service.generate_recommendations(user_profile, goals, milestones)
+        fingerprint = ai_service.context_fingerprint(user_profile, goals, milestones)
+        if not force_refresh:
+            cached = await get_cached_recommendations(user_id, fingerprint)
+            if cached:
+                return cached, None
+            
+            stored = await get_stored_recommendations(user_id)
+            if stored:
+                # Without an API key the worker could only regenerate the fallback set
+                job = await recommendation_worker.enqueue(user_id) if ai_service.api_key else None
+                return stored, job
+            
+            if ai_service.local.ready or not inline:
+                # First visit: answer locally right away, the LLM set follows in the background
+                job = await recommendation_worker.enqueue(user_id) if ai_service.api_key else None
+                return ai_service.local_recommendations(user_profile, goals, milestones), job
         
-        # Store recommendations in database for caching
-        if recommendations:
-            # Clear old recommendations
-            db.ai_recommendations.delete_many({"user_id": user_id})
-            # Insert new ones
-            for rec in recommendations:
-                db.ai_recommendations.insert_one(rec)
-        
-        return recommendations
+        # Generate (and store) recommendations using AI, sharing any in-flight call
+        recommendations = await recommendation_flights.run(
+            user_profile, goals, milestones, fingerprint, force_refresh=force_refresh
+        )
+        if not recommendations:
+            recommendations = ai_service.local_recommendations(user_profile, goals, milestones)
+        return recommendations, None
         
     except Exception as e:
         print(f"Error generating recommendations: {str(e)}")
         # Return cached recommendations if available
-        cached = list(db.ai_recommendations.find({"user_id": user_id}, {"_id": 0}))
+        cached = await get_stored_recommendations(user_id)
         if cached:
-            return cached
+            return cached, None
+        elif user_profile:
+            # Recommendations from colleagues' learning, padded with the basic fallback
+            return ai_service.local_recommendations(user_profile, goals, milestones), None
         else:
             # Return basic fallback recommendations
-            return ai_service._fallback_recommendations(user_id)
+            recommendation_fallback_counters["static"] += 1
+            return ai_service._fallback_recommendations(user_id), None
+
+# Single-flight LLM generation
+# Concurrent requests for the same user and context share one in-flight call.
+# Across processes, a lease document in llm_leases lets only one worker
+# generate for a user at a time; the others wait for its stored result.
+class RecommendationSingleFlight:
+    LEASE = timedelta(seconds=120)
+    WAIT_INTERVAL = 0.5
+    
+    def __init__(self):
+        self.owner = str(uuid.uuid4())
+        self.in_flight: Dict[str, asyncio.Future] = {}
+    
+    async def run(self, user_profile: dict, goals: list, milestones: list, fingerprint: str,
+                  force_refresh: bool = False) -> List[dict]:
+        key = f"{user_profile['id']}:{fingerprint}"
+        in_flight = self.in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            recommendations = await self._generate_with_lease(user_profile, goals, milestones, fingerprint, force_refresh)
+            future.set_result(recommendations)
+            return recommendations
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited doesn't warn on garbage collection
+            future.exception()
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+    
+    async def stream(self, user_profile: dict, goals: list, milestones: list, fingerprint: str):
+        """Like run, but yields (source, recommendation) pairs as they are produced.
+
+        Joins an in-flight generation for the same context, or waits out
+        another worker's lease, and replays that result instead of streaming
+        a second completion. The streamed set is stored before the lease is
+        released and resolves the in-flight future for concurrent callers.
+        """
+        user_id = user_profile["id"]
+        key = f"{user_id}:{fingerprint}"
+        in_flight = self.in_flight.get(key)
+        if in_flight is not None:
+            for rec in await asyncio.shield(in_flight):
+                yield "in_flight", rec
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        recommendations: List[dict] = []
+        lease_key = f"recommendations:{user_id}"
+        try:
+            while not await self._acquire(lease_key, fingerprint):
+                # Another worker is generating for this user; replay its result once stored
+                await asyncio.sleep(self.WAIT_INTERVAL)
+                cached = await get_cached_recommendations(user_id, fingerprint)
+                if cached:
+                    # Joined callers get the result now, not after this client has read it
+                    future.set_result(cached)
+                    for rec in cached:
+                        yield "cache", rec
+                    return
+            
+            try:
+                try:
+                    async with aclosing(ai_service.stream_recommendations(user_profile, goals, milestones)) as recs:
+                        async for rec in recs:
+                            recommendations.append(rec)
+                            yield "llm", rec
+                except Exception as e:
+                    # Keep what streamed before the failure; the caller falls back if nothing did
+                    print(f"Error streaming recommendations: {str(e)}")
+                
+                if recommendations:
+                    await store_recommendations(user_id, fingerprint, recommendations)
+                    if ai_service.is_shareable_context(goals, milestones):
+                        await store_shared_recommendations(ai_service.profile_signature(user_profile), recommendations)
+            finally:
+                await self._release(lease_key)
+        except BaseException:
+            if not future.done():
+                # Client went away (or storing failed) mid-stream; joined callers fall back
+                future.set_exception(LLMUnavailableError("Streamed generation did not complete"))
+                future.exception()
+            raise
+        finally:
+            # Every exit resolves the future, or joined callers would wait forever
+            if not future.done():
+                future.set_result(recommendations)
+            self.in_flight.pop(key, None)
+    
+    async def _acquire(self, lease_key: str, fingerprint: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            await db.llm_leases.find_one_and_update(
+                {"key": lease_key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": self.owner, "fingerprint": fingerprint, "expires_at": now + self.LEASE}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Someone else holds an unexpired lease
+            return False
+    
+    async def _release(self, lease_key: str):
+        await db.llm_leases.delete_one({"key": lease_key, "owner": self.owner})
+    
+    async def _generate_with_lease(self, user_profile: dict, goals: list, milestones: list, fingerprint: str,
+                                   force_refresh: bool) -> List[dict]:
+        user_id = user_profile["id"]
+        lease_key = f"recommendations:{user_id}"
+        check_cache = not force_refresh
+        while True:
+            if await self._acquire(lease_key, fingerprint):
+                try:
+                    if check_cache:
+                        cached = await get_cached_recommendations(user_id, fingerprint)
+                        if cached:
+                            return cached
+                    
+                    signature = ai_service.profile_signature(user_profile)
+                    if not force_refresh:
+                        shared = await get_shared_recommendations(signature, user_id)
+                        if shared:
+                            await store_recommendations(user_id, fingerprint, shared)
+                            return shared
+                    
+                    recommendations = await ai_service.generate_recommendations(user_profile, goals, milestones)
+                    if recommendations:
+                        await store_recommendations(user_id, fingerprint, recommendations)
+                        if ai_service.is_shareable_context(goals, milestones) and \
+                                not ai_service.is_fallback(recommendations):
+                            await store_shared_recommendations(signature, recommendations)
+                    return recommendations
+                finally:
+                    await self._release(lease_key)
+            
+            # Another worker is generating for this user; reuse its result once stored
+            check_cache = True
+            await asyncio.sleep(self.WAIT_INTERVAL)
+            cached = await get_cached_recommendations(user_id, fingerprint)
+            if cached:
+                return cached
+
+recommendation_flights = RecommendationSingleFlight()
+
+# Background recommendation generation
+# Jobs are persisted in recommendation_jobs so pending work survives restarts.
+# Workers claim jobs with a lease; a job whose lease expired (e.g. the process
+# died mid-generation) becomes claimable again.
+class RecommendationWorker:
+    LEASE = timedelta(minutes=5)
+    POLL_INTERVAL = 5
+    MAX_ATTEMPTS = 3
+    FINISHED_RETENTION = timedelta(days=1)
+    
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self.wakeup = asyncio.Event()
+        self.tasks: List[asyncio.Task] = []
+    
+    def start(self):
+        for _ in range(self.concurrency):
+            self.tasks.append(asyncio.create_task(self._run()))
+    
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+    
+    async def enqueue(self, user_id: str) -> dict:
+        """Queue a regeneration for this user, or return the one already queued"""
+        now = datetime.utcnow().isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "status": "pending",
+            "active": True,
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        for _ in range(2):
+            try:
+                await db.recommendation_jobs.insert_one(dict(job))
+                break
+            except DuplicateKeyError:
+                existing = await db.recommendation_jobs.find_one({"user_id": user_id, "active": True}, {"_id": 0})
+                if existing:
+                    return existing
+                # The active job finished between the insert and the lookup; try again
+        self.wakeup.set()
+        return job
+    
+    async def get_job(self, job_id: str, user_id: str) -> Optional[dict]:
+        return await db.recommendation_jobs.find_one(
+            {"id": job_id, "user_id": user_id},
+            {"_id": 0, "active": 0, "lease_expires_at": 0, "expires_at": 0}
+        )
+    
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await db.recommendation_jobs.find_one_and_update(
+            {"active": True, "$or": [
+                {"status": "pending"},
+                {"status": "running", "lease_expires_at": {"$lt": now}}
+            ]},
+            {"$set": {"status": "running", "lease_expires_at": now + self.LEASE, "updated_at": now.isoformat()},
+             "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def _finish(self, job: dict, status: str, error: Optional[str] = None):
+        now = datetime.utcnow()
+        update = {"$set": {"status": status, "error": error, "updated_at": now.isoformat()}}
+        if status == "pending":
+            update["$unset"] = {"lease_expires_at": ""}
+        else:
+            update["$set"]["expires_at"] = now + self.FINISHED_RETENTION
+            update["$unset"] = {"active": "", "lease_expires_at": ""}
+        await db.recommendation_jobs.update_one({"id": job["id"]}, update)
+    
+    async def _process(self, job: dict):
+        user_profile, goals, milestones = await load_recommendation_context(job["user_id"])
+        if not user_profile:
+            raise RuntimeError("User not found")
+        
+        fingerprint = ai_service.context_fingerprint(user_profile, goals, milestones)
+        # Returns the cached set if this context was already regenerated (e.g. by an explicit refresh)
+        recommendations = await recommendation_flights.run(user_profile, goals, milestones, fingerprint)
+        if not recommendations:
+            raise RuntimeError("No recommendations generated")
+    
+    async def _run(self):
+        while True:
+            try:
+                self.wakeup.clear()
+                job = await self._claim()
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), timeout=self.POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                try:
+                    await self._process(job)
+                    await self._finish(job, "done")
+                except Exception as e:
+                    print(f"Recommendation job {job['id']} failed: {str(e)}")
+                    retry = job.get("attempts", 0) < self.MAX_ATTEMPTS
+                    await self._finish(job, "pending" if retry else "failed", str(e))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Recommendation worker error: {str(e)}")
+                await asyncio.sleep(self.POLL_INTERVAL)
+
+recommendation_worker = RecommendationWorker(RECOMMENDATION_WORKERS)
 
-@app.post("/api/ai-recommendations/refresh")
+async def refresh_local_recommender_periodically():
+    while True:
+        try:
+            await ai_service.local.refresh()
+        except Exception as e:
+            print(f"Local recommender refresh error: {str(e)}")
+        await asyncio.sleep(LOCAL_RECOMMENDER_REFRESH_SECONDS)
+
+local_recommender_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def startup_recommendation_worker():
+    global local_recommender_task
+    recommendation_worker.start()
+    local_recommender_task = asyncio.create_task(refresh_local_recommender_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_recommendation_worker():
+    await recommendation_worker.stop()
+    if local_recommender_task:
+        local_recommender_task.cancel()
+
+@app.get("/api/ai-recommendations", response_model=List[AIRecommendation])
+async def get_ai_recommendations(response: Response, user_id: str = Depends(get_current_user)):
+    """Get personalized AI learning recommendations"""
+    recommendations, job = await recommendations_for_user(user_id)
+    if job:
+        response.headers["X-Recommendations-Stale"] = "true"
+        response.headers["X-Recommendation-Job"] = job["id"]
+    return recommendations
+
+@app.post("/api/ai-recommendations/refresh", response_model=List[AIRecommendation])
 async def refresh_ai_recommendations(user_id: str = Depends(get_current_user)):
     """Force refresh AI recommendations"""
-    # Clear cached recommendations
-    db.ai_recommendations.delete_many({"user_id": user_id})
+    # Bypass the cache; stored recommendations are kept until new ones replace them
+    recommendations, _ = await recommendations_for_user(user_id, force_refresh=True)
+    return recommendations
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/ai-recommendations/stream")
+async def stream_ai_recommendations(refresh: bool = False, user_id: str = Depends(get_current_user)):
+    """Server-Sent Events: one `recommendation` event per item as soon as it is complete, then `done`"""
+    async def events():
+        user_profile, goals, milestones = await load_recommendation_context(user_id)
+        if not user_profile:
+            yield sse_event("error", {"detail": "User not found"})
+            return
+        
+        fingerprint = ai_service.context_fingerprint(user_profile, goals, milestones)
+        if not refresh:
+            cached = await get_cached_recommendations(user_id, fingerprint)
+            if cached:
+                for rec in cached:
+                    yield sse_event("recommendation", rec)
+                yield sse_event("done", {"count": len(cached), "source": "cache"})
+                return
+            
+            shared = await get_shared_recommendations(ai_service.profile_signature(user_profile), user_id)
+            if shared:
+                await store_recommendations(user_id, fingerprint, shared)
+                for rec in shared:
+                    yield sse_event("recommendation", rec)
+                yield sse_event("done", {"count": len(shared), "source": "shared_cache"})
+                return
+        
+        # Shares the single-flight and lease with the JSON endpoint and the worker
+        recommendations = []
+        source = "llm"
+        try:
+            async with aclosing(recommendation_flights.stream(user_profile, goals, milestones, fingerprint)) as recs:
+                async for source, rec in recs:
+                    recommendations.append(rec)
+                    yield sse_event("recommendation", rec)
+        except Exception as e:
+            print(f"Error streaming recommendations: {str(e)}")
+        
+        if not recommendations:
+            # Nothing usable streamed; same fallback chain as the JSON endpoint
+            fallback = await get_stored_recommendations(user_id) or \
+                ai_service.local_recommendations(user_profile, goals, milestones)
+            for rec in fallback:
+                yield sse_event("recommendation", rec)
+            yield sse_event("done", {"count": len(fallback), "source": "fallback"})
+            return
+        
+        yield sse_event("done", {"count": len(recommendations), "source": source})
     
-    # Get fresh recommendations
-    return await get_ai_recommendations(user_id)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/ai-recommendations/history")
+async def get_ai_recommendation_history(user_id: str = Depends(get_current_user)):
+    """Current and previous recommendation generations, newest first"""
+    stored = await db.ai_recommendations.find_one({"user_id": user_id}, {"_id": 0})
+    if not stored:
+        return []
+    current = {key: stored.get(key) for key in ("version", "context_fingerprint", "generated_at", "recommendations")}
+    return [current] + stored.get("history", [])
+
+@app.get("/api/ai-recommendations/jobs/{job_id}")
+async def get_recommendation_job(job_id: str, user_id: str = Depends(get_current_user)):
+    """Status of a background recommendation job"""
+    job = await recommendation_worker.get_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 # Resource directory endpoints
-@app.get("/api/resources")
-async def get_resources():
-    # Auto-generate from milestone entries
-    pipeline = [
-        {"$group": {
-            "_id": "$learning_source",
-            "count": {"$sum": 1},
-            "total_hours": {"$sum": "$hours_invested"},
-            "skills": {"$addToSet": "$what_learned"}
-        }},
-        {"$sort": {"count": -1}}
-    ]
+# Pages are the same for every caller, so each one is serialized once and
+# kept in memory together with its compressed encodings until a resource
+# write in this process invalidates it or RESOURCE_PAGE_CACHE_TTL passes.
+RESOURCE_PAGE_CACHE_TTL = float(os.environ.get('RESOURCE_PAGE_CACHE_TTL_SECONDS', '60'))
+RESOURCE_PAGE_CACHE_MAX_ENTRIES = 256
+resource_page_cache: Dict[tuple, dict] = {}
+resource_page_cache_counters = {"hits": 0, "misses": 0}
+resource_list_adapter = TypeAdapter(List[LearningResource])
+
+def invalidate_resource_page_cache():
+    resource_page_cache.clear()
+
+async def cached_resource_page(limit: int, after: Optional[str]) -> dict:
+    entry = resource_page_cache.get((limit, after))
+    if entry and entry["expires_at"] > time.monotonic():
+        resource_page_cache_counters["hits"] += 1
+        return entry
+    
+    resource_page_cache_counters["misses"] += 1
+    resources, next_cursor = await resource_page(limit, after)
+    body = resource_list_adapter.dump_json(resource_list_adapter.validate_python(resources))
+    entry = {
+        "expires_at": time.monotonic() + RESOURCE_PAGE_CACHE_TTL,
+        "next_cursor": next_cursor,
+        "bodies": {None: body}
+    }
+    while len(resource_page_cache) >= RESOURCE_PAGE_CACHE_MAX_ENTRIES:
+        resource_page_cache.pop(next(iter(resource_page_cache)))
+    resource_page_cache[(limit, after)] = entry
+    return entry
+
+@app.get("/api/resources", response_model=List[LearningResource])
+async def get_resources(
+    request: Request,
+    limit: int = Query(RESOURCE_PAGE_SIZE, ge=1, le=RESOURCE_MAX_PAGE_SIZE),
+    after: Optional[str] = None
+):
+    entry = await cached_resource_page(limit, after)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if len(entry["bodies"][None]) < COMPRESSION_MIN_SIZE:
+        encoding = None
+    if encoding not in entry["bodies"]:
+        # Compressed once per page, so spend the extra CPU on the best ratio
+        entry["bodies"][encoding] = compress_bytes(entry["bodies"][None], encoding, level=11 if encoding == "br" else 9)
     
-    resources = list(db.milestones.aggregate(pipeline))
-    formatted_resources = []
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if entry["next_cursor"]:
+        headers["X-Next-Cursor"] = entry["next_cursor"]
+    return Response(content=entry["bodies"][encoding], media_type="application/json", headers=headers)
+
+async def resource_page(limit: int, after: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    # Materialized from milestone entries, most used first
+    query = {"usage_count": {"$gt": 0}}
+    if after:
+        usage_count, resource_id = decode_cursor(after, 2)
+        query["$or"] = [
+            {"usage_count": {"$lt": usage_count}},
+            {"usage_count": usage_count, "id": {"$gt": resource_id}}
+        ]
     
-    for resource in resources:
-        formatted_resources.append({
-            "id": str(uuid.uuid4()),
-            "name": resource["_id"],
-            "usage_count": resource["count"],
-            "total_hours": resource["total_hours"],
-            "skills_taught": resource["skills"][:5],  # Limit to top 5 skills
-            "category": "auto-generated"
-        })
+    resources = await db.resource_directory.find(
+        query,
+        {"_id": 0, "id": 1, "name": 1, "usage_count": 1, "total_hours": 1, "skills_taught": 1, "category": 1}
+    ).sort([("usage_count", -1), ("id", 1)]).limit(limit + 1).to_list(length=limit + 1)
+    
+    next_cursor = None
+    if len(resources) > limit:
+        resources = resources[:limit]
+        last = resources[-1]
+        next_cursor = encode_cursor([last["usage_count"], last["id"]])
+    
+    return resources, next_cursor
+
+# Admin exports
+# Streamed straight from a Mongo cursor in fixed-size batches, so memory stays
+# constant regardless of export size.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = {
+    "milestones": ["id", "user_id", "goal_id", "what_learned", "learning_source", "can_teach_others",
+                   "hours_invested", "project_certificate_link", "created_at", "month_year"],
+    "goals": ["id", "user_id", "title", "description", "target_completion", "status", "created_at"]
+}
+
+def next_month(month_year: str) -> str:
+    year, month = (int(part) for part in month_year.split("-"))
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+async def export_rows(dataset: str, export_format: str, query: dict):
+    columns = EXPORT_COLUMNS[dataset]
+    cursor = db[dataset].find(query, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE).sort(
+        [("user_id", 1), ("created_at", -1), ("id", -1)]
+    )
     
-    return formatted_resources
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for doc in cursor:
+            writer.writerow([doc.get(column, "") for column in columns])
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        lines = []
+        async for doc in cursor:
+            lines.append(json.dumps(doc))
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+@app.get("/api/admin/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "ndjson",
+    user_id: Optional[str] = None,
+    department: Optional[str] = None,
+    month_from: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    month_to: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    admin_id: str = Depends(get_current_admin)
+):
+    """Stream milestones or goals as NDJSON or CSV, filtered by user, department and month range"""
+    if dataset not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail="Unknown dataset")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    
+    query = {}
+    if department:
+        user_ids = [u["id"] async for u in db.users.find({"department": department}, {"_id": 0, "id": 1})]
+        if user_id:
+            user_ids = [uid for uid in user_ids if uid == user_id]
+        query["user_id"] = {"$in": user_ids}
+    elif user_id:
+        query["user_id"] = user_id
+    
+    if month_from or month_to:
+        if dataset == "milestones":
+            month_range = {}
+            if month_from:
+                month_range["$gte"] = month_from
+            if month_to:
+                month_range["$lte"] = month_to
+            query["month_year"] = month_range
+        else:
+            # Goals have no month_year; ISO created_at strings sort chronologically
+            created_range = {}
+            if month_from:
+                created_range["$gte"] = month_from
+            if month_to:
+                created_range["$lt"] = next_month(month_to)
+            query["created_at"] = created_range
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d')}.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        export_rows(dataset, format, query),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Admin slow query log
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = 1.0
+
+async def explain_slow_queries_periodically():
+    while True:
+        try:
+            await slow_query_recorder.explain_pending()
+        except Exception as e:
+            print(f"Slow query explain error: {str(e)}")
+        await asyncio.sleep(SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS)
+
+slow_query_explain_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def startup_slow_query_explainer():
+    global slow_query_explain_task
+    slow_query_explain_task = asyncio.create_task(explain_slow_queries_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_slow_query_explainer():
+    if slow_query_explain_task:
+        slow_query_explain_task.cancel()
+
+@app.get("/api/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=SLOW_QUERY_LOG_SIZE),
+    collscan_only: bool = False,
+    admin_id: str = Depends(get_current_admin)
+):
+    """Most recent slow Mongo commands, newest first"""
+    return {
+        "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "capacity": SLOW_QUERY_LOG_SIZE,
+        "entries": slow_query_recorder.recent(limit, collscan_only)
+    }
 
 # Dashboard stats
-@app.get("/api/dashboard/stats")
-async def get_dashboard_stats(user_id: str = Depends(get_current_user)):
+def dashboard_stats_pipeline(user_id: str, current_month: str) -> list:
+    """Everything the dashboard needs in one round trip, rooted at the user document"""
+    return [
+        {"$match": {"id": user_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0, "id": 1}},
+        {"$lookup": {
+            "from": "user_month_rollups",
+            "pipeline": [
+                {"$match": {"user_id": user_id}},
+                {"$group": {
+                    "_id": None,
+                    "current_month_hours": {"$sum": {"$cond": [{"$eq": ["$month_year", current_month]}, "$hours", 0]}},
+                    "total_hours": {"$sum": "$hours"},
+                    "total_milestones": {"$sum": "$milestone_count"}
+                }}
+            ],
+            "as": "rollups"
+        }},
+        {"$lookup": {
+            "from": "milestones",
+            "pipeline": [
+                {"$match": {"user_id": user_id}},
+                {"$sort": {"created_at": -1}},
+                {"$limit": 5},
+                {"$project": {"_id": 0}}
+            ],
+            "as": "recent_milestones"
+        }},
+        {"$lookup": {
+            "from": "goals",
+            "pipeline": [
+                {"$match": {"user_id": user_id, "status": "active"}},
+                {"$count": "count"}
+            ],
+            "as": "active_goals"
+        }}
+    ]
+
+@app.get("/api/dashboard/stats", response_model=DashboardStats)
+async def get_dashboard_stats(request: Request, response: Response, user_id: str = Depends(get_current_user)):
     current_month = datetime.utcnow().strftime("%Y-%m")
+    not_modified = await conditional_get(request, response, user_id, current_month)
+    if not_modified:
+        return not_modified
     
-    # Current month progress
-    current_milestones = list(db.milestones.find({"user_id": user_id, "month_year": current_month}))
-    current_hours = sum(m["hours_invested"] for m in current_milestones)
+    results = await db.users.aggregate(dashboard_stats_pipeline(user_id, current_month)).to_list(length=1)
+    result = results[0] if results else {}
     
-    # Total stats
-    total_milestones = db.milestones.count_documents({"user_id": user_id})
-    total_hours = sum(m["hours_invested"] for m in db.milestones.find({"user_id": user_id}))
-    active_goals = db.goals.count_documents({"user_id": user_id, "status": "active"})
-    
-    # Recent milestones
-    recent_milestones = list(db.milestones.find(
-        {"user_id": user_id}, 
-        {"_id": 0}
-    ).sort([("created_at", -1)]).limit(5))
+    rollups = (result.get("rollups") or [{}])[0]
+    active_goals_group = result.get("active_goals") or [{}]
     
+    return dashboard_stats(
+        rollups.get("current_month_hours", 0),
+        rollups.get("total_hours", 0),
+        rollups.get("total_milestones", 0),
+        active_goals_group[0].get("count", 0),
+        result.get("recent_milestones", [])
+    )
+
+def dashboard_stats(current_hours: float, total_hours: float, total_milestones: int, active_goals: int, recent_milestones: List[dict]) -> dict:
     return {
         "current_month_hours": current_hours,
         "target_hours": 6,
@@ -556,6 +3342,154 @@ async def get_dashboard_stats(user_id: str = Depends(get_current_user)):
         "recent_milestones": recent_milestones
     }
 
+# Dashboard bootstrap
+# Everything the dashboard renders on first paint in one request. Each
+# underlying read is issued once and shared by every section that needs it;
+# sections run concurrently and one that misses BOOTSTRAP_SECTION_TIMEOUT is
+# returned as null and listed under "partial", for the client to fetch from its
+# own endpoint.
+BOOTSTRAP_SECTION_TIMEOUT = float(os.environ.get('BOOTSTRAP_SECTION_TIMEOUT', '2.0'))
+BOOTSTRAP_RECENT_MILESTONES = 5
+
+@app.get("/api/dashboard/bootstrap")
+async def get_dashboard_bootstrap(
+    user_id: str = Depends(get_current_user),
+    goals_limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    resources_limit: int = Query(RESOURCE_PAGE_SIZE, ge=1, le=RESOURCE_MAX_PAGE_SIZE)
+):
+    current_month = datetime.utcnow().strftime("%Y-%m")
+    
+    # Shared reads
+    profile_task = asyncio.ensure_future(db.users.find_one({"id": user_id}, {"_id": 0, "password": 0, "data_version": 0}))
+    goals_task = asyncio.ensure_future(
+        db.goals.find({"user_id": user_id}, {"_id": 0})
+            .sort([("created_at", -1), ("id", -1)])
+            .limit(goals_limit + 1)
+            .to_list(length=goals_limit + 1)
+    )
+    month_milestones_task = asyncio.ensure_future(
+        db.milestones.find({"user_id": user_id, "month_year": current_month}, {"_id": 0})
+            .sort([("created_at", -1)])
+            .to_list(length=None)
+    )
+    rollups_task = asyncio.ensure_future(
+        db.user_month_rollups.find({"user_id": user_id}, {"_id": 0}).to_list(length=None)
+    )
+    
+    async def load_active_goals() -> List[dict]:
+        goals = await asyncio.shield(goals_task)
+        if len(goals) <= goals_limit:
+            # The first page is every goal the user has
+            return [goal for goal in goals if goal.get("status") == "active"]
+        return await db.goals.find({"user_id": user_id, "status": "active"}, RECOMMENDATION_GOAL_FIELDS).to_list(length=None)
+    
+    async def load_newest_milestones() -> List[dict]:
+        month_milestones = await asyncio.shield(month_milestones_task)
+        if len(month_milestones) >= RECOMMENDATION_MILESTONE_LIMIT:
+            return month_milestones[:RECOMMENDATION_MILESTONE_LIMIT]
+        return await db.milestones.find({"user_id": user_id}, {"_id": 0}).sort(
+            [("created_at", -1)]
+        ).limit(RECOMMENDATION_MILESTONE_LIMIT).to_list(length=RECOMMENDATION_MILESTONE_LIMIT)
+    
+    active_goals_task = asyncio.ensure_future(load_active_goals())
+    newest_milestones_task = asyncio.ensure_future(load_newest_milestones())
+    shared_tasks = [profile_task, goals_task, month_milestones_task, rollups_task, active_goals_task, newest_milestones_task]
+    
+    cursors = {}
+    recommendation_job = {}
+    
+    async def profile_section():
+        profile = await asyncio.shield(profile_task)
+        if not profile:
+            raise HTTPException(status_code=404, detail="User not found")
+        return profile
+    
+    async def stats_section():
+        rollups, active_goals, newest = await asyncio.gather(
+            asyncio.shield(rollups_task), asyncio.shield(active_goals_task), asyncio.shield(newest_milestones_task)
+        )
+        current_rollup = next((r for r in rollups if r.get("month_year") == current_month), None)
+        return dashboard_stats(
+            rollup_progress(current_rollup)["hours"],
+            sum(r.get("hours", 0) for r in rollups),
+            sum(r.get("milestone_count", 0) for r in rollups),
+            len(active_goals),
+            newest[:BOOTSTRAP_RECENT_MILESTONES]
+        )
+    
+    async def goals_section():
+        goals = await asyncio.shield(goals_task)
+        if len(goals) > goals_limit:
+            goals = goals[:goals_limit]
+            cursors["goals"] = encode_cursor([goals[-1]["created_at"], goals[-1]["id"]])
+        return goals
+    
+    async def current_month_section():
+        rollups, month_milestones = await asyncio.gather(asyncio.shield(rollups_task), asyncio.shield(month_milestones_task))
+        current_rollup = next((r for r in rollups if r.get("month_year") == current_month), None)
+        return current_month_progress(current_rollup, month_milestones, current_month)
+    
+    async def resources_section():
+        resources, next_cursor = await resource_page(resources_limit, None)
+        if next_cursor:
+            cursors["resources"] = next_cursor
+        return resources
+    
+    async def recommendations_section():
+        profile, active_goals, newest = await asyncio.gather(
+            asyncio.shield(profile_task), asyncio.shield(active_goals_task), asyncio.shield(newest_milestones_task)
+        )
+        # Never generate inline here: the section timeout would cancel a
+        # completion we paid for. Stored or local results, plus a queued job.
+        recommendations, job = await recommendations_for_user(
+            user_id, context=(profile, active_goals, list(reversed(newest))) if profile else None, inline=False
+        )
+        if job:
+            recommendation_job["id"] = job["id"]
+        return recommendations
+    
+    sections = {
+        "profile": profile_section,
+        "stats": stats_section,
+        "goals": goals_section,
+        "current_month": current_month_section,
+        "resources": resources_section,
+        "ai_recommendations": recommendations_section
+    }
+    
+    async def run_section(name, section):
+        try:
+            return await asyncio.wait_for(section(), BOOTSTRAP_SECTION_TIMEOUT)
+        except HTTPException:
+            raise
+        except asyncio.TimeoutError:
+            print(f"Dashboard bootstrap section {name} timed out")
+        except Exception as e:
+            print(f"Dashboard bootstrap section {name} failed: {str(e)}")
+        return None
+    
+    try:
+        results = await asyncio.gather(*(run_section(name, section) for name, section in sections.items()))
+    finally:
+        # Reads only a timed-out section was waiting on
+        for task in shared_tasks:
+            if not task.done():
+                task.cancel()
+    
+    body = dict(zip(sections, results))
+    body["partial"] = [name for name, result in body.items() if result is None]
+    body["cursors"] = cursors
+    body["recommendation_job"] = recommendation_job.get("id")
+    return body
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild-rollups":
+        # python server.py rebuild-rollups [user_id]
+        rebuilt = asyncio.run(rebuild_user_month_rollups(sys.argv[2] if len(sys.argv) > 2 else None))
+        print(f"Rebuilt {rebuilt} monthly rollups")
+    elif len(sys.argv) > 1 and sys.argv[1] == "rebuild-resources":
+        rebuilt = asyncio.run(rebuild_resource_directory())
+        print(f"Rebuilt {rebuilt} resource directory entries")
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
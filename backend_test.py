@@ -58,6 +58,22 @@ class LearningTrackerAPITester:
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
+    def test_health(self):
+        """Test health endpoint and index bootstrap status"""
+        success, response = self.run_test(
+            "Health Check",
+            "GET",
+            "api/health",
+            200
+        )
+        
+        if success:
+            print(f"   Status: {response.get('status', 'N/A')}")
+            for collection, indexes in response.get('indexes', {}).items():
+                print(f"   {collection}: {indexes}")
+        
+        return success
+
     def test_user_registration(self):
         """Test user registration"""
         test_user_data = {
@@ -168,6 +184,62 @@ class LearningTrackerAPITester:
         )
         return success
 
+    def test_get_milestones_page(self):
+        """Test keyset pagination of milestones"""
+        self.tests_run += 1
+        print(f"\n🔍 Testing Get Milestones First Page...")
+        try:
+            response = requests.get(
+                f"{self.base_url}/api/milestones?limit=1&can_teach_others=true",
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+            result = response.json()
+            success = response.status_code == 200 and isinstance(result, list) and len(result) <= 1
+        except Exception as e:
+            print(f"❌ Failed - Error: {str(e)}")
+            return False
+        
+        if success:
+            self.tests_passed += 1
+            print(f"✅ Passed - Page size: {len(result)}, next cursor: {response.headers.get('X-Next-Cursor')}")
+        else:
+            print(f"❌ Failed - Status: {response.status_code}, Response: {str(result)[:200]}")
+        return success
+
+    def test_import_milestones(self):
+        """Test bulk NDJSON import reports per-row errors"""
+        if not self.created_goal_id:
+            print("❌ Cannot import milestones - no goal ID available")
+            return False
+        
+        rows = [
+            {"goal_id": self.created_goal_id, "what_learned": "Docker basics", "learning_source": "Docker Docs",
+             "can_teach_others": False, "hours_invested": 2, "created_at": "2024-01-10T09:00:00"},
+            {"goal_id": self.created_goal_id, "what_learned": "Missing hours"}
+        ]
+        payload = "\n".join(json.dumps(row) for row in rows).encode()
+        
+        self.tests_run += 1
+        print(f"\n🔍 Testing Bulk Milestone Import...")
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/import/milestones",
+                files={"file": ("milestones.ndjson", payload)},
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+            result = response.json()
+            success = response.status_code == 200 and result.get("inserted") == 1 and result.get("failed") == 1
+        except Exception as e:
+            print(f"❌ Failed - Error: {str(e)}")
+            return False
+        
+        if success:
+            self.tests_passed += 1
+            print(f"✅ Passed - Inserted: {result['inserted']}, Failed: {result['failed']}")
+        else:
+            print(f"❌ Failed - Status: {response.status_code}, Response: {result}")
+        return success
+
     def test_get_current_month_progress(self):
         """Test getting current month progress"""
         success, response = self.run_test(
@@ -199,6 +271,25 @@ class LearningTrackerAPITester:
         
         return success
 
+    def test_dashboard_bootstrap(self):
+        """Test the combined first-paint dashboard payload"""
+        success, response = self.run_test(
+            "Get Dashboard Bootstrap",
+            "GET",
+            "api/dashboard/bootstrap",
+            200
+        )
+        
+        if success:
+            print(f"   Partial sections: {response.get('partial', [])}")
+            sections = ['profile', 'stats', 'goals', 'current_month', 'resources', 'ai_recommendations']
+            missing = [section for section in sections if section not in response]
+            if missing:
+                print(f"   ⚠️  Missing sections: {missing}")
+                return False
+        
+        return success
+
     def test_get_resources(self):
         """Test getting auto-generated resources"""
         success, response = self.run_test(
@@ -213,6 +304,33 @@ class LearningTrackerAPITester:
         
         return success
 
+    def test_export_requires_admin(self):
+        """Test that exports are restricted to admins"""
+        success, response = self.run_test(
+            "Export Milestones As Employee",
+            "GET",
+            "api/admin/export/milestones?format=csv",
+            403
+        )
+        return success
+
+    def test_cannot_self_promote_to_admin(self):
+        """Test that an employee cannot grant themselves the admin role"""
+        self.run_test(
+            "Update Profile With Role",
+            "PUT",
+            "api/profile",
+            200,
+            data={"role": "admin", "position": "Software Developer"}
+        )
+        success, response = self.run_test(
+            "Export Milestones After Role Update",
+            "GET",
+            "api/admin/export/milestones?format=csv",
+            403
+        )
+        return success
+
     def test_get_ai_recommendations(self):
         """Test getting AI learning recommendations"""
         success, response = self.run_test(
@@ -269,6 +387,9 @@ def main():
     # Test sequence
     test_results = []
     
+    # Health check
+    test_results.append(("Health Check", tester.test_health()))
+    
     # Authentication tests
     test_results.append(("User Registration", tester.test_user_registration()))
     
@@ -284,11 +405,16 @@ def main():
     
     # Milestones tests
     test_results.append(("Create Milestone", tester.test_create_milestone()))
+    test_results.append(("Bulk Milestone Import", tester.test_import_milestones()))
+    test_results.append(("Milestones First Page", tester.test_get_milestones_page()))
     test_results.append(("Current Month Progress", tester.test_get_current_month_progress()))
     
     # Dashboard and resources tests
     test_results.append(("Dashboard Stats", tester.test_get_dashboard_stats()))
+    test_results.append(("Dashboard Bootstrap", tester.test_dashboard_bootstrap()))
     test_results.append(("Learning Resources", tester.test_get_resources()))
+    test_results.append(("Export Requires Admin", tester.test_export_requires_admin()))
+    test_results.append(("No Self-Promotion To Admin", tester.test_cannot_self_promote_to_admin()))
     
     # AI Recommendations tests (NEW FEATURE)
     test_results.append(("AI Recommendations", tester.test_get_ai_recommendations()))
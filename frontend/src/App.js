@@ -15,6 +15,7 @@ import { Plus, Target, BookOpen, Clock, TrendingUp, Award, Users, Lightbulb, Spa
 import './App.css';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
+const GOALS_PAGE_SIZE = 50;
 
 function App() {
   const [user, setUser] = useState(null);
@@ -32,7 +33,6 @@ function App() {
 
   useEffect(() => {
     if (token) {
-      fetchUserProfile();
       fetchDashboardData();
     }
   }, [token]);
@@ -56,33 +56,72 @@ function App() {
   };
 
   const fetchDashboardData = async () => {
+    try {
+      // One request for first paint; sections the server could not finish in
+      // time come back null and are listed in `partial`
+      const response = await fetch(`${API_URL}/api/dashboard/bootstrap?goals_limit=${GOALS_PAGE_SIZE}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      if (response.status === 401) {
+        localStorage.removeItem('token');
+        setToken(null);
+        return;
+      }
+      if (!response.ok) return fetchDashboardSections(['profile', 'stats', 'goals', 'current_month', 'resources']);
+
+      const data = await response.json();
+      if (data.profile) {
+        setUser(data.profile);
+        setCurrentView('dashboard');
+      }
+      if (data.stats) setDashboardStats(data.stats);
+      if (data.goals) setGoals(data.goals);
+      if (data.current_month) setMilestones(data.current_month.milestones || []);
+      if (data.resources) setResources(data.resources);
+      if (data.ai_recommendations) {
+        setAiRecommendations(data.ai_recommendations);
+        if (data.recommendation_job) pollRecommendationJob(data.recommendation_job);
+      }
+      if (data.partial.length > 0) fetchDashboardSections(data.partial);
+    } catch (error) {
+      console.error('Error fetching dashboard data:', error);
+    }
+  };
+
+  // Individual endpoints answer with ETags, so refetches after a mutation
+  // only transfer the sections that actually changed
+  const fetchDashboardSections = async (sections = ['stats', 'goals', 'current_month', 'resources']) => {
+    if (sections.includes('profile')) fetchUserProfile();
     try {
       const [statsRes, goalsRes, milestonesRes, resourcesRes] = await Promise.all([
-        fetch(`${API_URL}/api/dashboard/stats`, {
+        sections.includes('stats') && fetch(`${API_URL}/api/dashboard/stats`, {
           headers: { Authorization: `Bearer ${token}` }
         }),
-        fetch(`${API_URL}/api/goals`, {
+        // First page only; older goals are available through the X-Next-Cursor header
+        sections.includes('goals') && fetch(`${API_URL}/api/goals?limit=${GOALS_PAGE_SIZE}`, {
           headers: { Authorization: `Bearer ${token}` }
         }),
-        fetch(`${API_URL}/api/milestones/current-month`, {
+        sections.includes('current_month') && fetch(`${API_URL}/api/milestones/current-month`, {
           headers: { Authorization: `Bearer ${token}` }
         }),
-        fetch(`${API_URL}/api/resources`)
+        sections.includes('resources') && fetch(`${API_URL}/api/resources`)
       ]);
 
-      if (statsRes.ok) setDashboardStats(await statsRes.json());
-      if (goalsRes.ok) setGoals(await goalsRes.json());
-      if (milestonesRes.ok) {
+      if (statsRes && statsRes.ok) setDashboardStats(await statsRes.json());
+      if (goalsRes && goalsRes.ok) setGoals(await goalsRes.json());
+      if (milestonesRes && milestonesRes.ok) {
         const monthData = await milestonesRes.json();
         setMilestones(monthData.milestones || []);
       }
-      if (resourcesRes.ok) setResources(await resourcesRes.json());
+      if (resourcesRes && resourcesRes.ok) setResources(await resourcesRes.json());
+      if (sections.includes('ai_recommendations')) fetchAIRecommendations();
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
     }
   };
 
   const fetchAIRecommendations = async (refresh = false) => {
+    if (refresh) return streamAIRecommendations();
     setLoadingAI(true);
     try {
       const endpoint = refresh ? '/api/ai-recommendations/refresh' : '/api/ai-recommendations';
@@ -96,6 +135,10 @@ function App() {
       if (response.ok) {
         const recommendations = await response.json();
         setAiRecommendations(recommendations);
+
+        // Stale results: a background job is regenerating them
+        const jobId = response.headers.get('X-Recommendation-Job');
+        if (jobId) pollRecommendationJob(jobId);
       }
     } catch (error) {
       console.error('Error fetching AI recommendations:', error);
@@ -103,6 +146,68 @@ function App() {
     setLoadingAI(false);
   };
 
+  // Server-Sent Events over fetch (EventSource cannot send the auth header):
+  // each recommendation is shown as soon as the model has finished it
+  const streamAIRecommendations = async () => {
+    setLoadingAI(true);
+    try {
+      const response = await fetch(`${API_URL}/api/ai-recommendations/stream?refresh=true`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+
+      if (response.ok && response.body) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let received = [];
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          const events = buffer.split('\n\n');
+          buffer = events.pop();
+          for (const rawEvent of events) {
+            const lines = rawEvent.split('\n');
+            const eventLine = lines.find((line) => line.startsWith('event: '));
+            const dataLine = lines.find((line) => line.startsWith('data: '));
+            if (eventLine && dataLine && eventLine.slice(7) === 'recommendation') {
+              received = [...received, JSON.parse(dataLine.slice(6))];
+              setAiRecommendations(received);
+            }
+          }
+        }
+      }
+    } catch (error) {
+      console.error('Error streaming AI recommendations:', error);
+    }
+    setLoadingAI(false);
+  };
+
+  const pollRecommendationJob = async (jobId, attempt = 0) => {
+    if (attempt >= 30) return;
+    await new Promise((resolve) => setTimeout(resolve, 2000));
+    try {
+      const response = await fetch(`${API_URL}/api/ai-recommendations/jobs/${jobId}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      if (!response.ok) return;
+
+      const job = await response.json();
+      if (job.status === 'done') {
+        const recsRes = await fetch(`${API_URL}/api/ai-recommendations`, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        if (recsRes.ok) setAiRecommendations(await recsRes.json());
+      } else if (job.status !== 'failed') {
+        pollRecommendationJob(jobId, attempt + 1);
+      }
+    } catch (error) {
+      console.error('Error polling recommendation job:', error);
+    }
+  };
+
   const handleAuth = async (endpoint, data) => {
     setLoading(true);
     try {
@@ -147,7 +252,7 @@ function App() {
       });
       
       if (response.ok) {
-        fetchDashboardData();
+        fetchDashboardSections();
         return true;
       }
     } catch (error) {
@@ -168,7 +273,7 @@ function App() {
       });
       
       if (response.ok) {
-        fetchDashboardData();
+        fetchDashboardSections();
         return true;
       }
     } catch (error) {
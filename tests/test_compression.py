@@ -0,0 +1,87 @@
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+import server
+from server import CompressionMiddleware, negotiate_encoding
+
+BODY = "milestone,hours\n" * 200
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for _ in range(3):
+                yield "row\n" * 10
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter(["event: done\ndata: {}\n\n" * 100]), media_type="text/event-stream")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return PlainTextResponse(gzip.compress(BODY.encode()), headers={"Content-Encoding": "gzip"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+def test_negotiate_encoding_prefers_brotli_and_honours_q_zero(monkeypatch):
+    monkeypatch.setattr(server, "brotli", object())
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("br;q=0, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0, *;q=0") is None
+    assert negotiate_encoding("") is None
+
+
+def test_negotiate_encoding_skips_brotli_when_not_installed(monkeypatch):
+    monkeypatch.setattr(server, "brotli", None)
+    assert negotiate_encoding("br, gzip") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+def test_large_body_is_gzipped_with_vary_and_length(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+
+def test_small_and_unaccepted_bodies_pass_through(client):
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert zlib.decompress(raw, 31) == ("row\n" * 30).encode()
+
+
+def test_event_streams_and_precompressed_bodies_are_untouched(client):
+    assert "content-encoding" not in client.get("/events", headers={"Accept-Encoding": "gzip"}).headers
+    response = client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BODY
@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from server import GoalUpdate
+
+
+def test_goal_update_sets_only_typed_non_null_fields(monkeypatch):
+    updates = []
+
+    async def update_one(query, update):
+        updates.append((query, update))
+        return SimpleNamespace(matched_count=1)
+
+    async def bump_data_version(*user_ids):
+        pass
+
+    monkeypatch.setattr(server, "db", SimpleNamespace(goals=SimpleNamespace(update_one=update_one)))
+    monkeypatch.setattr(server, "bump_data_version", bump_data_version)
+    goal = GoalUpdate(**{"title": None, "status": "completed", "user_id": "someone-else", "created_at": 5})
+    asyncio.run(server.update_goal("g1", goal, user_id="u1"))
+    assert updates == [({"id": "g1", "user_id": "u1"}, {"$set": {"status": "completed"}})]
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.update_goal("g1", GoalUpdate(title=None), user_id="u1"))
+    assert excinfo.value.status_code == 400
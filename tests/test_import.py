@@ -0,0 +1,50 @@
+import io
+from datetime import datetime
+
+import server
+from server import is_utf8, parse_import_created_at, read_import_chunk
+
+GOAL = {"title": "Learn Go", "description": "d", "target_completion": "2026-12"}
+
+
+def test_read_import_chunk_stops_at_chunk_size(monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_CHUNK_SIZE", 2)
+    rows = iter([(1, GOAL), (2, GOAL), (3, GOAL)])
+    received, docs, rejected = read_import_chunk(rows, "goals", "ndjson", "u1", False)
+    assert (received, [row for row, _ in docs], rejected) == (2, [1, 2], [])
+    assert read_import_chunk(rows, "goals", "ndjson", "u1", False)[0] == 1
+    assert read_import_chunk(rows, "goals", "ndjson", "u1", False) == (0, [], [])
+
+
+def test_read_import_chunk_rejects_rows_for_other_users_unless_admin():
+    rows = [(1, {**GOAL, "user_id": "u2"}), (2, {**GOAL, "user_id": ["u2"]}), (3, ValueError("bad")), (4, {"title": 5})]
+    _, docs, rejected = read_import_chunk(iter(rows), "goals", "ndjson", "u1", False)
+    assert docs == []
+    assert [row for row, _ in rejected] == [1, 2, 3, 4]
+    assert rejected[0][1] == ["Only admins can import rows for other users"]
+
+    _, docs, _ = read_import_chunk(iter(rows), "goals", "ndjson", "u1", True)
+    assert [(row, doc["user_id"]) for row, doc in docs] == [(1, "u2")]
+
+
+def test_created_at_offsets_are_converted_to_utc():
+    assert parse_import_created_at("2024-01-31T23:30:00-05:00") == datetime(2024, 2, 1, 4, 30)
+    assert parse_import_created_at("2024-01-31T23:30:00Z") == datetime(2024, 1, 31, 23, 30)
+    assert parse_import_created_at("2024-01-31T23:30:00") == datetime(2024, 1, 31, 23, 30)
+
+
+def test_imported_milestone_lands_in_its_utc_month():
+    row = {"goal_id": "g", "what_learned": "Go", "learning_source": "Docs", "can_teach_others": False,
+           "hours_invested": 1, "created_at": "2024-01-31T23:30:00-05:00"}
+    _, docs, _ = read_import_chunk(iter([(1, row)]), "milestones", "ndjson", "u1", False)
+    assert docs[0][1]["month_year"] == "2024-02"
+    assert docs[0][1]["created_at"].startswith("2024-02-01T04:30")
+
+
+def test_is_utf8_rejects_latin1_and_rewinds():
+    valid = io.BytesIO("\ufeffwhat_learned\nCafé ☕\n".encode("utf-8"))
+    assert is_utf8(valid, block_size=1)  # multi-byte characters split across blocks
+    assert valid.tell() == 0
+    invalid = io.BytesIO("what_learned\nCafé\n".encode("latin-1"))
+    assert not is_utf8(invalid)
+    assert invalid.tell() == 0
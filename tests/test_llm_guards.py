@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from server import CircuitBreaker, LLMLimiter, LLMUnavailableError
+
+
+def open_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def expire(breaker):
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_half_open_breaker_admits_a_single_probe():
+    breaker = open_breaker()
+    expire(breaker)
+    assert breaker.allow_request()
+    assert breaker.state == "half_open"
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["probe_in_flight"]
+
+
+def test_successful_probe_closes_the_breaker():
+    breaker = open_breaker()
+    expire(breaker)
+    breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = open_breaker()
+    expire(breaker)
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_released_or_lost_probe_lets_the_next_caller_probe():
+    breaker = open_breaker()
+    expire(breaker)
+    breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.allow_request()
+
+    breaker.probe_started_at -= breaker.reset_timeout
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_limiter_caps_concurrency_and_queue():
+    async def scenario():
+        limiter = LLMLimiter(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.snapshot()["queue_depth"] == 1
+        with pytest.raises(LLMUnavailableError, match="queue is full"):
+            await limiter.acquire()
+        limiter.release()
+        await waiter
+        assert limiter.snapshot() == {"in_flight": 1, "queue_depth": 0, "max_concurrency": 1}
+        with pytest.raises(LLMUnavailableError, match="Timed out"):
+            await limiter.acquire()
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_limiter_call_releases_its_slot_on_timeout():
+    async def scenario():
+        limiter = LLMLimiter(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.call(lambda: asyncio.sleep(1), timeout=0.01)
+        assert limiter.in_flight == 0
+        assert await limiter.call(lambda: asyncio.sleep(0, result="ok"), timeout=1) == "ok"
+
+    asyncio.run(scenario())
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from server import IncrementalJSONArrayParser, LearningRecommendationService
+
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_parser_yields_objects_split_across_chunks():
+    text = '```json\n[{"title": "A", "tags": ["x", "y"]}, {"title": "B}{\\"quoted\\"]"}]\n```'
+    items = feed_all(IncrementalJSONArrayParser(), [text[i:i + 3] for i in range(0, len(text), 3)])
+    assert items == [{"title": "A", "tags": ["x", "y"]}, {"title": 'B}{"quoted"]'}]
+
+
+def test_parser_skips_invalid_and_non_object_items():
+    items = feed_all(IncrementalJSONArrayParser(), ['[{"title": "A",}, [1, 2], {"title": "B"}]', '[{"title": "C"}]'])
+    assert items == [{"title": "B"}]
+
+
+class FakeChat:
+    def __init__(self, count):
+        self.count = count
+        self.closed = False
+
+    async def _stream(self):
+        try:
+            yield "["
+            for i in range(self.count):
+                yield json.dumps({"title": f"Skill {i}"}) + ","
+            yield "]"
+        finally:
+            self.closed = True
+
+    def stream_message(self, message):
+        return self._stream()
+
+
+def test_stream_stopping_early_releases_limiter_and_records_success(monkeypatch):
+    async def no_log(*args, **kwargs):
+        pass
+
+    chat = FakeChat(8)
+    service = LearningRecommendationService()
+    service.api_key = "test-key"
+    monkeypatch.setattr(service, "_build_chat", lambda user_profile, model: chat)
+    monkeypatch.setattr(server, "record_llm_call", no_log)
+    monkeypatch.setattr(server, "llm_breaker", server.CircuitBreaker(1, 60))
+    monkeypatch.setattr(server, "llm_limiter", server.LLMLimiter(1, 1, 1))
+    server.llm_breaker.failures = 1
+
+    async def collect():
+        profile = {"id": "user-1", "existing_skills": [], "learning_interests": []}
+        return [rec async for rec in service.stream_recommendations(profile, [], [])]
+
+    recs = asyncio.run(collect())
+    assert [rec["title"] for rec in recs] == [f"Skill {i}" for i in range(5)]
+    assert chat.closed
+    assert server.llm_limiter.in_flight == 0
+    assert (server.llm_breaker.state, server.llm_breaker.failures) == ("closed", 0)
+
+
+def test_caller_joining_a_stream_replaying_the_cache_gets_the_result(monkeypatch):
+    stored = [{"title": "Stored 1"}, {"title": "Stored 2"}]
+
+    async def lease_held(self, lease_key, fingerprint):
+        return False
+
+    async def cached(user_id, fingerprint):
+        return stored
+
+    monkeypatch.setattr(server.RecommendationSingleFlight, "_acquire", lease_held)
+    monkeypatch.setattr(server.RecommendationSingleFlight, "WAIT_INTERVAL", 0)
+    monkeypatch.setattr(server, "get_cached_recommendations", cached)
+
+    async def scenario():
+        flights = server.RecommendationSingleFlight()
+        profile = {"id": "user-1"}
+        stream = flights.stream(profile, [], [], "fp")
+        assert await stream.__anext__() == ("cache", stored[0])
+        # Joins while the stream is paused mid-replay
+        assert await asyncio.wait_for(flights.run(profile, [], [], "fp"), timeout=1) == stored
+        await stream.aclose()
+        assert flights.in_flight == {}
+
+    asyncio.run(scenario())
+
+
+def test_stream_that_fails_to_open_releases_its_limiter_slot(monkeypatch):
+    class BrokenChat:
+        def stream_message(self, message):
+            raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(server, "llm_breaker", server.CircuitBreaker(5, 60))
+    monkeypatch.setattr(server, "llm_limiter", server.LLMLimiter(1, 1, 0.1))
+
+    async def consume():
+        return [chunk async for chunk in server.stream_llm(BrokenChat(), "hi")]
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(consume())
+    assert server.llm_limiter.in_flight == 0
+    assert server.llm_breaker.failures == 2
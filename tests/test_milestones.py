@@ -0,0 +1,14 @@
+import pytest
+from pydantic import ValidationError
+
+from server import MilestoneUpdate
+
+
+def test_milestone_update_coerces_values_and_drops_ownership_fields():
+    update = MilestoneUpdate(**{"hours_invested": "3", "can_teach_others": "true", "user_id": "other", "month_year": "2020-01"})
+    assert update.model_dump(exclude_unset=True) == {"hours_invested": 3.0, "can_teach_others": True}
+
+
+def test_milestone_update_rejects_values_of_the_wrong_type():
+    with pytest.raises(ValidationError):
+        MilestoneUpdate(hours_invested="three")
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from server import decode_cursor, encode_cursor, find_page
+
+ITEMS = [
+    {"id": "c", "created_at": "2024-03-01T00:00:00"},
+    {"id": "b", "created_at": "2024-02-01T00:00:00"},
+    {"id": "a", "created_at": "2024-02-01T00:00:00"},
+]
+
+
+class FakeCollection:
+    """Applies find_page's keyset query to an in-memory list already sorted newest first"""
+
+    def __init__(self, items):
+        self.items = items
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        self.matched = [item for item in self.items if self.matches(item, query)]
+        return self
+
+    def matches(self, item, query):
+        for branch in query.get("$or", [{}]):
+            created = branch.get("created_at")
+            if created is None:
+                return True
+            if isinstance(created, dict):
+                if item["created_at"] < created["$lt"]:
+                    return True
+            elif item["created_at"] == created and item["id"] < branch["id"]["$lt"]:
+                return True
+        return False
+
+    def sort(self, keys):
+        assert keys == [("created_at", -1), ("id", -1)]
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    async def to_list(self, length):
+        return self.matched[:self.count]
+
+
+def test_cursor_round_trips_and_rejects_malformed_values():
+    assert decode_cursor(encode_cursor(["2024-01-01T00:00:00", "id-1"]), 2) == ["2024-01-01T00:00:00", "id-1"]
+    for cursor in (encode_cursor(["only-one"]), encode_cursor({"created_at": "x"}), "not-base64!!"):
+        with pytest.raises(HTTPException) as excinfo:
+            decode_cursor(cursor, 2)
+        assert excinfo.value.status_code == 400
+
+
+def test_find_page_walks_ties_on_created_at_without_skipping_or_repeating():
+    collection = FakeCollection(ITEMS)
+    seen = []
+    after = None
+    for _ in range(len(ITEMS) + 1):
+        response = Response()
+        page = asyncio.run(find_page(collection, {"user_id": "u1"}, response, 1, after))
+        seen += [item["id"] for item in page]
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+    assert seen == ["c", "b", "a"]
+    assert collection.queries[0] == {"user_id": "u1"}
+    assert collection.queries[-1]["user_id"] == "u1"
+
+
+def test_find_page_sets_no_cursor_on_an_exact_last_page():
+    response = Response()
+    page = asyncio.run(find_page(FakeCollection(ITEMS), {}, response, len(ITEMS), None))
+    assert len(page) == len(ITEMS)
+    assert "X-Next-Cursor" not in response.headers
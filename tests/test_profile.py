@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+
+import server
+from server import ProfileUpdate
+
+
+def test_profile_update_ignores_server_owned_fields():
+    update = ProfileUpdate(**{
+        "position": "Lead Developer",
+        "role": "admin",
+        "email": "someone@example.com",
+        "password": "x",
+        "created_at": "2020-01-01",
+        "data_version": 0
+    })
+    assert update.model_dump(exclude_unset=True) == {"position": "Lead Developer"}
+
+
+def test_profile_update_drops_nulls_for_required_fields(monkeypatch):
+    updates = []
+
+    async def update_one(query, update):
+        updates.append(update)
+
+    monkeypatch.setattr(server, "db", SimpleNamespace(users=SimpleNamespace(update_one=update_one)))
+    profile = ProfileUpdate(full_name=None, existing_skills=None, department="Data", profile_picture=None)
+    asyncio.run(server.update_profile(profile, user_id="u1"))
+    assert updates == [{"$inc": {"data_version": 1}, "$set": {"department": "Data", "profile_picture": None}}]
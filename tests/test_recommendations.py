@@ -0,0 +1,54 @@
+from server import AIRecommendation, LearningRecommendationService
+
+
+def test_format_recommendation_coerces_model_output_to_response_types():
+    service = LearningRecommendationService()
+    rec = service._format_recommendation({
+        "title": None,
+        "description": 42,
+        "skill_category": ["Technical"],
+        "recommended_resources": [{"name": "Kubernetes Docs", "url": "https://k8s.io"}, {"url": "https://x.dev"}, 7, None, ""],
+        "difficulty_level": "Advanced",
+        "estimated_hours": "7.5",
+        "priority_score": "high"
+    }, 2, "user-1")
+
+    AIRecommendation(**rec)
+    assert rec["title"] == "Learning Recommendation 3"
+    assert rec["description"] == "42"
+    assert rec["skill_category"] == "General"
+    assert rec["recommended_resources"] == ["Kubernetes Docs", "https://x.dev", "7"]
+    assert rec["estimated_hours"] == 8
+    assert rec["priority_score"] == 75
+
+
+def test_format_recommendation_accepts_single_resource_string_and_non_dict_items():
+    service = LearningRecommendationService()
+    assert service._format_recommendation({"recommended_resources": "A book"}, 0, "u")["recommended_resources"] == ["A book"]
+    AIRecommendation(**service._format_recommendation("not an object", 0, "u"))
+
+
+def test_parse_ai_response_output_validates():
+    service = LearningRecommendationService()
+    response = '```json\n[{"title": "Docker", "recommended_resources": [{"name": "Docker Docs"}], "estimated_hours": 6}]\n```'
+    recs = service._parse_ai_response(response, "u")
+    assert [AIRecommendation(**rec).recommended_resources for rec in recs] == [["Docker Docs"]]
+
+
+def test_shared_prompt_holds_only_signature_fields():
+    service = LearningRecommendationService()
+    profile = {"id": "u", "full_name": "Ada Lovelace", "position": "Senior Data Engineer", "department": "Data",
+               "date_of_joining": "2021-04-01", "existing_skills": ["Python"], "learning_interests": ["ML"]}
+    goals = [{"title": "Ship the secret project", "status": "active"}]
+    milestones = [{"what_learned": "Private topic", "learning_source": "Course", "hours_invested": 2}]
+
+    assert service.is_shareable_context([], [])
+    shared = service._build_learning_context(profile, [], [])
+    for personal in ("Ada Lovelace", "Senior Data Engineer", "2021-04-01"):
+        assert personal not in shared
+    assert "Role level: senior" in shared and "Python" in shared and "ML" in shared
+
+    assert not service.is_shareable_context(goals, [])
+    assert not service.is_shareable_context([], milestones)
+    personal = service._build_learning_context(profile, goals, milestones)
+    assert "Ada Lovelace" in personal and "Ship the secret project" in personal
@@ -0,0 +1,35 @@
+from server import command_shape, redact_shape
+
+
+def test_redact_shape_replaces_literals_and_keeps_shape_fields():
+    shape = redact_shape({
+        "filter": {"user_id": "u1", "created_at": {"$gte": "2024-01-01"}, "id": {"$in": ["a", "b", "c"]}},
+        "sort": {"created_at": -1},
+        "limit": 20
+    })
+    assert shape == {
+        "filter": {"user_id": "?", "created_at": {"$gte": "?"}, "id": {"$in": ["?"]}},
+        "sort": {"created_at": -1},
+        "limit": 20
+    }
+
+
+def test_redact_shape_keeps_pipeline_structure():
+    pipeline = [{"$match": {"user_id": "u1"}}, {"$sort": {"hours": -1}}, {"$limit": 5}]
+    assert redact_shape(pipeline) == [{"$match": {"user_id": "?"}}, {"$sort": {"hours": -1}}, {"$limit": 5}]
+
+
+def test_command_shape_drops_noise_and_summarises_batches():
+    shape = command_shape("insert", {
+        "insert": "milestones",
+        "documents": [{"what_learned": "Secret", "hours_invested": 2}, {"what_learned": "Other", "hours_invested": 3}],
+        "ordered": False,
+        "lsid": {"id": "session"},
+        "$db": "learning_tracker"
+    })
+    assert shape == {
+        "insert": "milestones",
+        "documents": [{"what_learned": "?", "hours_invested": "?"}],
+        "documents_count": 2,
+        "ordered": False
+    }